@@ -0,0 +1,57 @@
+"""Show how the rendering cost per output character depends on nesting depth.
+
+Every structure holds the same leaves wrapped into a different number of nested lists.
+A renderer that copies nested strings into their parents gets slower per character
+as the depth grows, a single-buffer renderer stays flat.
+
+Run from the repository root:
+
+    python -m benchmarks.depth_scaling
+"""
+import argparse
+import time
+from typing import Any
+
+from pprinty import pformat
+
+
+def build_value(depth: int, leaves: int) -> Any:
+    value = list(range(leaves))
+
+    for _ in range(depth):
+        value = [value]
+
+    return value
+
+
+def measure(value: Any, indent: int, repeat: int) -> float:
+    best = float("inf")
+    pformat(value, indent=indent)
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pformat(value, indent=indent)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leaves", type=int, default=100000)
+    parser.add_argument("--indent", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 10, 50, 100, 200, 400])
+    args = parser.parse_args()
+
+    print(f"{'depth':>6} {'chars':>10} {'seconds':>10} {'ns/char':>8}")
+
+    for depth in args.depths:
+        value = build_value(depth, args.leaves)
+        size = len(pformat(value, indent=args.indent))
+        seconds = measure(value, args.indent, args.repeat)
+        print(f"{depth:>6} {size:>10} {seconds:>10.4f} {seconds / size * 1e9:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare repeated dumps of a large frozen config with and without the render cache.
+
+Run from the repository root:
+
+    python -m benchmarks.frozen_config
+"""
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Any, Tuple
+
+from pprinty import PrettyPrinter
+
+
+@dataclass(frozen=True)
+class Section:
+    name: str
+    options: Tuple[Tuple[str, Any], ...]
+    tags: frozenset
+
+
+def build_config(sections: int) -> Tuple[Section, ...]:
+    return tuple(
+        Section(
+            name=f"section{i}",
+            options=tuple((f"option{j}", j * 0.5) for j in range(20)),
+            tags=frozenset(f"tag{j}" for j in range(5))
+        )
+        for i in range(sections)
+    )
+
+
+def measure(printer: PrettyPrinter, value: Any, repeat: int) -> float:
+    best = float("inf")
+    printer.pformat(value)
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        printer.pformat({"request": len(value), "config": value})
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--cache-size", type=int, default=64 * 1024 * 1024)
+    args = parser.parse_args()
+    value = build_config(args.sections)
+
+    for name, printer in (
+        ("no cache", PrettyPrinter()),
+        ("cache", PrettyPrinter(cache_size=args.cache_size))
+    ):
+        print(f"{name:<10} {measure(printer, value, args.repeat):>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Measure the peak RSS of rendering compared to recursive string concatenation.
+
+Every measurement runs in a fresh process, which builds a value, records its RSS
+and renders the value. The reported number is the growth of the peak RSS while rendering.
+"concatenation" is the recursive renderer of the first release of pprinty,
+which built a string of every container from strings of its items.
+
+Run from the repository root:
+
+    python -m benchmarks.memory
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Any, Dict
+
+
+SHAPES = {
+    "wide list": "list(range(1000000))",
+    "list of dicts": "[{'a': i, 'b': [str(i), (i,)]} for i in range(200000)]",
+    "deep nesting": "build_deep(500, 1000)"
+}
+MODES = {
+    "concatenation": "len(get_concatenated_string(value, 4, 0))",
+    "pformat": "len(pformat(value))",
+    "iter_pprint": "sum(map(len, iter_pprint(value)))",
+    "pformat width=80": "len(pformat(value, width=80))"
+}
+SCRIPT = """
+import json
+import resource
+import sys
+
+from pprinty import pformat, iter_pprint
+from benchmarks.memory import build_deep, get_concatenated_string
+
+sys.setrecursionlimit(10000)
+value = {shape}
+start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+size = {mode}
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in kilobytes on Linux.
+print(json.dumps({{"size": size, "rss": (peak - start) * 1024}}))
+"""
+
+
+def build_deep(depth: int, leaves: int) -> Any:
+    value = list(range(leaves))
+
+    for _ in range(depth):
+        value = [value]
+
+    return value
+
+
+def get_concatenated_string(value: Any, indent: int, level: int) -> str:
+    if isinstance(value, dict):
+        start_string, end_string = "{", "}"
+        lines = [
+            f"{' ' * indent * (level + 1)}{key!r}: "
+            f"{get_concatenated_string(item, indent, level + 1)}"
+            for key, item in value.items()
+        ]
+    elif isinstance(value, (list, tuple)):
+        start_string, end_string = ("[", "]") if isinstance(value, list) else ("(", ")")
+        lines = [
+            " " * indent * (level + 1) + get_concatenated_string(item, indent, level + 1)
+            for item in value
+        ]
+
+        if isinstance(value, tuple) and len(lines) == 1:
+            lines = [f"{lines[0]},"]
+    else:
+        return repr(value)
+
+    if not lines:
+        return start_string + end_string
+
+    return f"{start_string}\n" + ",\n".join(lines) + f"\n{' ' * indent * level}{end_string}"
+
+
+def measure(shape: str, mode: str) -> Dict[str, int]:
+    process = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(shape=SHAPES[shape], mode=MODES[mode])],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    return json.loads(process.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    print(f"{'shape':<16} {'mode':<18} {'output MB':>10} {'peak RSS MB':>12}")
+
+    for shape in SHAPES:
+        for mode in MODES:
+            result = measure(shape, mode)
+            print(
+                f"{shape:<16} {mode:<18} "
+                f"{result['size'] / 1e6:>10.1f} {result['rss'] / 1e6:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Run the benchmark suite over the pprint hot paths.
+
+Every shape is rendered with `pformat` several times. The suite reports the best time,
+the output throughput in MB/s, the number of rendered objects per second
+and the peak memory allocated while rendering.
+
+Run from the repository root:
+
+    python -m benchmarks.run --save before.json
+    python -m benchmarks.run --save after.json
+    python -m benchmarks.run --compare before.json after.json --threshold 10
+
+Comparing exits with status 1 if any shape got slower by more than the threshold in percent.
+"""
+import argparse
+import dataclasses
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from pprinty import pformat
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+    label: str
+
+
+@dataclass
+class Node:
+    name: str
+    children: List["Node"]
+    point: Point
+
+
+@dataclass
+class SlotsPoint:
+    __slots__ = ("x", "y", "label")
+    x: int
+    y: int
+    label: str
+
+
+def build_tree(depth: int, width: int) -> Node:
+    children = [] if depth == 0 else [build_tree(depth - 1, width) for _ in range(width)]
+
+    return Node(name=f"node{depth}", children=children, point=Point(depth, width, "p"))
+
+
+def build_deep(depth: int) -> Any:
+    value = list(range(10))
+
+    for _ in range(depth):
+        value = [value]
+
+    return value
+
+
+SHAPES: Dict[str, Callable[[], Any]] = {
+    "wide list": lambda: list(range(200000)),
+    "wide dict": lambda: {f"key{i}": i for i in range(100000)},
+    "deep nesting": lambda: build_deep(2000),
+    "big set": lambda: set(range(100000)),
+    "big frozenset": lambda: frozenset(map(str, range(100000))),
+    "nested dataclasses": lambda: build_tree(7, 4),
+    "slots dataclasses": lambda: [SlotsPoint(i, -i, str(i)) for i in range(30000)],
+    "long strings": lambda: ["x" * 100000 + str(i) for i in range(100)]
+}
+
+
+def count_objects(value: Any) -> int:
+    count = 0
+    stack = [value]
+
+    while stack:
+        value = stack.pop()
+        count += 1
+
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+        elif dataclasses.is_dataclass(value):
+            stack.extend(getattr(value, field.name) for field in dataclasses.fields(value))
+
+    return count
+
+
+def measure(value: Any, indent: int, repeat: int) -> Dict[str, float]:
+    size = len(pformat(value, indent=indent).encode())
+    objects = count_objects(value)
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pformat(value, indent=indent)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    pformat(value, indent=indent)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": best,
+        "bytes": size,
+        "objects": objects,
+        "mb_per_second": size / best / 1e6,
+        "objects_per_second": objects / best,
+        "peak_memory": peak
+    }
+
+
+def run(names: List[str], indent: int, repeat: int) -> Dict[str, Any]:
+    results = {}
+    print(f"{'shape':<20} {'seconds':>9} {'MB/s':>8} {'objects/s':>11} {'peak MB':>8}")
+
+    for name in names:
+        result = results[name] = measure(SHAPES[name](), indent, repeat)
+        print(
+            f"{name:<20} {result['seconds']:>9.4f} {result['mb_per_second']:>8.1f} "
+            f"{result['objects_per_second']:>11.0f} {result['peak_memory'] / 1e6:>8.1f}"
+        )
+
+    return {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "indent": indent,
+        "results": results
+    }
+
+
+def compare(before_path: str, after_path: str, threshold: float) -> bool:
+    with open(before_path) as file:
+        before = json.load(file)["results"]
+
+    with open(after_path) as file:
+        after = json.load(file)["results"]
+
+    ok = True
+    print(f"{'shape':<20} {'before':>9} {'after':>9} {'change':>8} {'peak':>8}")
+
+    for name in before.keys() & after.keys():
+        change = (after[name]["seconds"] / before[name]["seconds"] - 1) * 100
+        peak_change = (after[name]["peak_memory"] / max(before[name]["peak_memory"], 1) - 1) * 100
+        mark = ""
+
+        if change > threshold:
+            mark = "  slower"
+            ok = False
+
+        print(
+            f"{name:<20} {before[name]['seconds']:>9.4f} {after[name]['seconds']:>9.4f} "
+            f"{change:>+7.1f}% {peak_change:>+7.1f}%{mark}"
+        )
+
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("shapes", nargs="*", metavar="SHAPE", help=f"One of: {', '.join(SHAPES)}.")
+    parser.add_argument("--indent", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="PATH")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(*args.compare, args.threshold) else 1)
+
+    unknown_shapes = set(args.shapes) - SHAPES.keys()
+
+    if unknown_shapes:
+        parser.error(f"unknown shapes: {', '.join(sorted(unknown_shapes))}")
+
+    report = run(args.shapes or list(SHAPES), args.indent, args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measure rendering of wide, shallow structures where line prefixes dominate.
+
+Every item of these structures is a small container on its own lines,
+so the time goes to separators, indent prefixes and closing brackets
+rather than to leaf reprs. Every shape is also rendered by a printer
+building prefixes with `" " * indent * level` for every container
+instead of taking them from its table, to show the gain of the table.
+
+Run from the repository root:
+
+    python -m benchmarks.wide_shallow
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from pprinty import PrettyPrinter
+from pprinty.pprint import _build_prefixes
+
+
+SHAPES: Dict[str, Callable[[int], Any]] = {
+    "dict of lists": lambda size: {f"key{i}": [i] for i in range(size)},
+    "list of dicts": lambda size: [{"a": i, "b": i} for i in range(size)],
+    "list of tuples": lambda size: [(i,) for i in range(size)],
+    "nested dicts": lambda size: {i: {i: {i: i}} for i in range(size)}
+}
+
+
+class UncachedPrefixesPrinter(PrettyPrinter):
+    """A printer building line prefixes again for every container."""
+
+    def _get_prefixes(self, level: int) -> Tuple[str, str, str]:
+        return _build_prefixes(self._indent, level)
+
+
+def measure(printer: PrettyPrinter, value: Any, repeat: int) -> float:
+    best = float("inf")
+    printer.pformat(value)
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        printer.pformat(value)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--indent", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    printer = PrettyPrinter(indent=args.indent)
+    uncached_printer = UncachedPrefixesPrinter(indent=args.indent)
+
+    print(
+        f"{'shape':<16} {'lines':>10} {'seconds':>10} {'ns/line':>8} "
+        f"{'uncached, s':>12} {'speedup':>8}"
+    )
+
+    for name, build_value in SHAPES.items():
+        value = build_value(args.size)
+        lines = printer.pformat(value).count("\n") + 1
+        seconds = measure(printer, value, args.repeat)
+        uncached_seconds = measure(uncached_printer, value, args.repeat)
+        print(
+            f"{name:<16} {lines:>10} {seconds:>10.4f} {seconds / lines * 1e9:>8.1f} "
+            f"{uncached_seconds:>12.4f} {uncached_seconds / seconds:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,30 @@
-from .pprint import pprint
+from .pprint import pprint, pformat, iter_pprint, PrettyPrinter
+from .registry import register, unregister, override
+from .stats import RenderStats, NodeStats
+from .pdiff import pdiff
 
+__all__ = [
+    "pprint",
+    "pformat",
+    "iter_pprint",
+    "pdiff",
+    "apprint",
+    "PrettyPrinter",
+    "register",
+    "unregister",
+    "override",
+    "RenderStats",
+    "NodeStats"
+]
 
-__all__ = ["pprint"]
+
+def __getattr__(name: str) -> object:
+    # apprint needs asyncio, which takes longer to import than the rest of the package.
+    if name == "apprint":
+        from ._apprint import apprint
+
+        globals()["apprint"] = apprint
+
+        return apprint
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
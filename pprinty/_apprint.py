@@ -0,0 +1,107 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import inspect
+
+from .pprint import _get_printer
+
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from typing import Any, Optional
+
+    from .stats import RenderStats
+
+
+async def apprint(
+    value: Any,
+    writer: Any,
+    *,
+    indent: int = 4,
+    references: bool = False,
+    width: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    max_items: Optional[int] = None,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False,
+    sort_keys: bool = False,
+    sort_sets: bool = False,
+    workers: Optional[int] = None,
+    encoding: Optional[str] = None,
+    stats: Optional[RenderStats] = None
+) -> None:
+    """Write a decomposed value to an asyncio stream without blocking the event loop.
+
+    The value is decomposed chunk by chunk in the default executor of the loop.
+    Every chunk is written as soon as it's ready, and the writer is drained after it,
+    so backpressure of the stream is respected.
+
+    :param value: A value to write.
+    :param writer: An asyncio.StreamWriter or any object with a `write` method,
+        plain or async, and optionally an async `drain` method.
+    :param indent: A number of spaces before a string. Used to decompose containers.
+    :param references: Decompose a container met more than once only the first time,
+        later occurrences refer to the first one.
+    :param width: A maximum line width. Containers fitting into it are printed on one line.
+        By default, every non-empty container is decomposed.
+    :param max_depth: A maximum number of nested container levels to decompose.
+        Deeper containers are printed as "[...]".
+    :param max_items: A maximum number of items to print of every container.
+        The rest are replaced with "... (N more)" without being decomposed.
+    :param max_string: A maximum number of characters or bytes to print of every string.
+        The rest are replaced with "... (N more)".
+    :param elide_middle: Keep both the start and the end of strings longer than max_string,
+        the middle is replaced with "... (N more) ...".
+    :param sort_keys: Print keys of dicts sorted, see `PrettyPrinter`.
+    :param sort_sets: Print items of sets and frozensets sorted, see `PrettyPrinter`.
+    :param workers: A number of processes to render big containers with (see `PrettyPrinter`).
+    :param encoding: An encoding of chunks for a writer of bytes.
+        By default, chunks are encoded to UTF-8 for an asyncio.StreamWriter
+        and written as strings otherwise.
+    :param stats: Statistics to collect of decomposing, see `RenderStats`.
+        Time spent waiting for the writer isn't counted.
+    :raises ValueError: If an indent, a width or a limit is less than zero,
+        if workers are less than one or if workers are set with references.
+    """
+    printer = _get_printer(
+        indent=indent,
+        references=references,
+        width=width,
+        max_depth=max_depth,
+        max_items=max_items,
+        max_string=max_string,
+        elide_middle=elide_middle,
+        sort_keys=sort_keys,
+        sort_sets=sort_sets,
+        workers=workers
+    )
+
+    if encoding is None and isinstance(writer, asyncio.StreamWriter):
+        encoding = "utf-8"
+
+    loop = asyncio.get_running_loop()
+    # Executor threads don't inherit context variables, overridden renderers among them.
+    context = contextvars.copy_context()
+    chunks = printer.iter_pprint(value, stats=stats)
+
+    while True:
+        chunk = await loop.run_in_executor(None, context.run, next, chunks, None)
+
+        if chunk is None:
+            break
+
+        await _write_chunk(writer, chunk, encoding)
+
+    await _write_chunk(writer, "\n", encoding)
+
+
+async def _write_chunk(writer: Any, chunk: str, encoding: Optional[str]) -> None:
+    result = writer.write(chunk if encoding is None else chunk.encode(encoding))
+
+    if inspect.isawaitable(result):
+        await result
+
+    drain = getattr(writer, "drain", None)
+
+    if drain is not None:
+        await drain()
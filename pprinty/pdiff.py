@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+from .pprint import (
+    _get_frozenset_container,
+    _get_leaf_string,
+    _get_printer,
+    _get_set_container,
+    _get_sorted_frozenset_container,
+    _get_sorted_set_container
+)
+from .registry import _get_renderers
+
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+    from .pprint import PrettyPrinter
+
+    # An operation of a diff of containers: ("same", number of items),
+    # ("-", name, old value), ("+", name, new value) or ("pair", name, old value, new value).
+    _Operation = Tuple[Any, ...]
+
+
+def pdiff(
+    old: Any,
+    new: Any,
+    *,
+    indent: int = 4,
+    width: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    max_items: Optional[int] = None,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False,
+    sort_keys: bool = False,
+    sort_sets: bool = False
+) -> str:
+    """Get a diff of two versions of a value.
+
+    Both values are walked together. Equal items are skipped without being decomposed
+    and replaced with "... (N unchanged)", so the cost depends on the size of a change
+    rather than on the size of a value. Containers of the same type are compared
+    item by item: dicts and records by keys and names, sets by items and sequences
+    by positions, after their equal starts and ends are skipped.
+    Other changed values are decomposed in full. Lines start with "-" for removed ones,
+    "+" for added ones and " " for context.
+
+    :param old: An old version of a value.
+    :param new: A new version of a value.
+    :param indent: A number of spaces before a string. Used to decompose containers.
+    :param width: A maximum line width of decomposed values, see `PrettyPrinter`.
+    :param max_depth: A maximum number of nested container levels to decompose.
+        Deeper containers are printed as "[...]".
+    :param max_items: A maximum number of items to print of every decomposed container.
+    :param max_string: A maximum number of characters or bytes to print of every string.
+    :param elide_middle: Keep both the start and the end of strings longer than max_string.
+    :param sort_keys: Print keys of dicts sorted, see `PrettyPrinter`.
+    :param sort_sets: Print items of sets and frozensets sorted, see `PrettyPrinter`.
+    :return: A diff or an empty string if the values are equal.
+    :raises ValueError: If an indent, a width or a limit is less than zero.
+    """
+    printer = _get_printer(
+        indent=indent,
+        width=width,
+        max_depth=max_depth,
+        max_items=max_items,
+        max_string=max_string,
+        elide_middle=elide_middle,
+        sort_keys=sort_keys,
+        sort_sets=sort_sets
+    )
+
+    if _is_equal(old, new):
+        return ""
+
+    return "\n".join(marker + line for marker, line in _Differ(printer).diff(old, new))
+
+
+class _Differ:
+    """A walker of two versions of a value, writing lines of their diff.
+
+    Like the printer, it walks containers with an explicit stack,
+    so the nesting depth is limited only by memory.
+    Pairs on the first levels are compared as a whole, which is fast for equal ones.
+    Deeper pairs of containers are walked instead, so that a deep path to a change
+    isn't compared again on every level of it. A container is written only
+    when a change is found in it, otherwise it's unchanged.
+    """
+
+    def __init__(self, printer: PrettyPrinter) -> None:
+        self._printer = printer
+        self._getters = printer._get_dispatcher(_get_renderers())
+        self._indent = " " * printer._indent
+        self._lines = []
+
+    def diff(self, old: Any, new: Any) -> List[List[str]]:
+        """
+        :return: Lines as [marker, line] lists.
+        """
+        lines = self._lines
+        containers = self._get_containers(old, new, 0)
+
+        if containers is None:
+            self._write_value("-", 0, "", old)
+            self._write_value("+", 0, "", new)
+
+            return lines
+
+        pair_ids = id(old), id(new)
+        path_ids = {pair_ids}
+        # A frame is [operations, level, comma, last line end string, end string,
+        # indexes of last lines of the previous item, number of unchanged items, pair ids,
+        # a start line or None if it's written]. A replaced item has two last lines,
+        # of its old and new versions.
+        stack = [self._open(0, "", containers, pair_ids)]
+        self._write_start(stack, 0)
+        # Frames below this one have their start lines written.
+        written_size = 1
+
+        while stack:
+            frame = stack[-1]
+            operations, level = frame[0], frame[1]
+
+            for operation in operations:
+                kind = operation[0]
+
+                if kind == "same":
+                    frame[6] += operation[1]
+                    continue
+
+                if kind == "pair":
+                    _, name, old, new = operation
+                    pair_ids = id(old), id(new)
+
+                    is_compared = level < _MAX_COMPARED_LEVEL
+
+                    if pair_ids in path_ids or is_compared and _is_equal(old, new):
+                        # An equal pair or a recursive one, which is already being compared.
+                        frame[6] += 1
+                        continue
+
+                    containers = self._get_containers(old, new, level + 1)
+
+                    if containers is not None:
+                        path_ids.add(pair_ids)
+                        stack.append(self._open(level + 1, name, containers, pair_ids))
+                        break
+
+                    if not is_compared and _is_equal(old, new):
+                        frame[6] += 1
+                        continue
+
+                while written_size < len(stack):
+                    self._write_start(stack, written_size)
+                    written_size += 1
+
+                self._write_unchanged(frame)
+                self._start_item(frame)
+
+                if kind == "pair":
+                    frame[5].append(self._write_value("-", level + 1, name, old))
+                    frame[5].append(self._write_value("+", level + 1, name, new))
+                else:
+                    _, name, value = operation
+                    frame[5].append(self._write_value(kind, level + 1, name, value))
+            else:
+                stack.pop()
+                path_ids.discard(frame[7])
+
+                if frame[8] is not None:
+                    # No changes were found in the container.
+                    stack[-1][6] += 1
+                    continue
+
+                written_size = len(stack)
+                self._write_unchanged(frame)
+
+                for i in frame[5]:
+                    lines[i][1] += frame[3]
+
+                lines.append([" ", self._indent * level + frame[4]])
+
+                if stack:
+                    stack[-1][5].append(len(lines) - 1)
+
+        return lines
+
+    def _get_containers(
+        self,
+        old: Any,
+        new: Any,
+        level: int
+    ) -> Optional[Tuple[Any, Any, Any, tuple, tuple]]:
+        """Get containers of two versions of a value if they can be compared item by item.
+
+        :return: A getter, the versions and their containers or None if the versions are
+            of different types, printed as strings or have different start or end strings.
+        """
+        if type(old) is not type(new) or level >= self._printer._max_depth:
+            return None
+
+        getter = self._getters[type(old)]
+
+        if getter is repr or getter is _get_leaf_string or getter is str:
+            # Strings of values are taken only to print them.
+            return None
+
+        old_container = getter(old)
+
+        if old_container.__class__ is not tuple:
+            return None
+
+        new_container = getter(new)
+
+        if (
+            new_container.__class__ is not tuple
+            or old_container[0] != new_container[0]
+            or old_container[2] != new_container[2]
+        ):
+            return None
+
+        return getter, old, new, old_container, new_container
+
+    def _open(
+        self,
+        level: int,
+        name: str,
+        containers: Tuple[Any, Any, Any, tuple, tuple],
+        pair_ids: Tuple[int, int]
+    ) -> list:
+        getter, old, new, old_container, new_container = containers
+        start_string, old_items, end_string, last_line_end_string, _ = old_container
+        old_items = _list_items(old_items)
+        new_items = _list_items(new_container[1])
+
+        if getter in _SET_GETTERS:
+            operations = _iter_set_operations(old, new, old_items, new_items)
+        elif (old_items[0][0] or new_items[0][0]) and _has_unique_names(old_items, new_items):
+            operations = _iter_named_operations(old_items, new_items)
+        else:
+            operations = _iter_sequence_operations(old_items, new_items)
+
+        return [
+            operations,
+            level,
+            "" if getter in self._printer._concatenated_getters else ",",
+            last_line_end_string,
+            end_string,
+            [],
+            0,
+            pair_ids,
+            self._indent * level + name + start_string
+        ]
+
+    def _write_start(self, stack: List[list], index: int) -> None:
+        # A container is written once a change is found in it, after items of its parent.
+        frame = stack[index]
+
+        if index:
+            self._write_unchanged(stack[index - 1])
+            self._start_item(stack[index - 1])
+
+        self._lines.append([" ", frame[8]])
+        frame[8] = None
+
+    def _start_item(self, frame: list) -> None:
+        for i in frame[5]:
+            self._lines[i][1] += frame[2]
+
+        frame[5].clear()
+
+    def _write_unchanged(self, frame: list) -> None:
+        if frame[6]:
+            self._start_item(frame)
+            self._lines.append([" ", f"{self._indent * (frame[1] + 1)}... ({frame[6]} unchanged)"])
+            frame[5].append(len(self._lines) - 1)
+            frame[6] = 0
+
+    def _write_value(self, marker: str, level: int, name: str, value: Any) -> int:
+        """Write lines of a decomposed value.
+
+        :return: An index of the last line.
+        """
+        # The indent is a part of the name, so that a width counts it.
+        string = self._printer._get_string(value, level, self._indent * level + name)
+        self._lines.extend([marker, line] for line in string.split("\n"))
+
+        return len(self._lines) - 1
+
+
+def _list_items(items: Iterable[Tuple[Any, Any]]) -> List[Tuple[str, Any]]:
+    # Names of long keys of dicts are slices of their reprs, a diff is built as a whole.
+    return [(name if name.__class__ is str else "".join(name), value) for name, value in items]
+
+
+def _has_unique_names(*items: List[Tuple[str, Any]]) -> bool:
+    # Keys cut to max_string may have equal names, then items are compared by positions.
+    return all(len({name for name, _ in i}) == len(i) for i in items)
+
+
+def _iter_named_operations(
+    old_items: List[Tuple[str, Any]],
+    new_items: List[Tuple[str, Any]]
+) -> Iterator[_Operation]:
+    # Items of dicts and records are matched by their names, keys or field names.
+    # Pairs of items are compared by the walker.
+    new_values = dict(new_items)
+    old_names = set()
+
+    for name, value in old_items:
+        old_names.add(name)
+
+        if name not in new_values:
+            yield "-", name, value
+        elif value is new_values[name]:
+            yield "same", 1
+        else:
+            yield "pair", name, value, new_values[name]
+
+    for name, value in new_items:
+        if name not in old_names:
+            yield "+", name, value
+
+
+def _iter_set_operations(
+    old: Any,
+    new: Any,
+    old_items: List[Tuple[str, Any]],
+    new_items: List[Tuple[str, Any]]
+) -> Iterator[_Operation]:
+    for _, value in old_items:
+        yield ("same", 1) if value in new else ("-", "", value)
+
+    for _, value in new_items:
+        if value not in old:
+            yield "+", "", value
+
+
+def _iter_sequence_operations(
+    old_items: List[Tuple[str, Any]],
+    new_items: List[Tuple[str, Any]]
+) -> Iterator[_Operation]:
+    # Equal starts and ends are skipped, so an inserted or a removed item
+    # doesn't shift the rest. Items between them are paired by positions
+    # and compared by the walker. Sequences of the same size aren't shifted,
+    # so all their items are paired.
+    size = min(len(old_items), len(new_items))
+    start = end = 0
+
+    if len(old_items) != len(new_items):
+        while start < size and _is_equal_item(old_items[start], new_items[start]):
+            start += 1
+
+        while end < size - start and _is_equal_item(old_items[-end - 1], new_items[-end - 1]):
+            end += 1
+
+    yield "same", start
+
+    old_end = len(old_items) - end
+    new_end = len(new_items) - end
+
+    for (old_name, old_value), (new_name, new_value) in zip(
+        old_items[start:old_end],
+        new_items[start:new_end]
+    ):
+        if old_name != new_name:
+            yield "-", old_name, old_value
+            yield "+", new_name, new_value
+        elif old_value is new_value:
+            yield "same", 1
+        else:
+            yield "pair", old_name, old_value, new_value
+
+    middle_size = min(old_end, new_end) - start
+
+    for name, value in old_items[start + middle_size:old_end]:
+        yield "-", name, value
+
+    for name, value in new_items[start + middle_size:new_end]:
+        yield "+", name, value
+
+    yield "same", end
+
+
+def _is_equal_item(old_item: Tuple[str, Any], new_item: Tuple[str, Any]) -> bool:
+    return old_item[0] == new_item[0] and _is_equal(old_item[1], new_item[1])
+
+
+def _is_equal(old: Any, new: Any) -> bool:
+    if old is new:
+        return True
+
+    if type(old) is not type(new):
+        return False
+
+    try:
+        return bool(old == new)
+    except Exception:
+        # Like NumPy arrays, which aren't equal as a whole, or recursive containers.
+        return False
+
+
+# Pairs on deeper levels are walked instead of being compared as a whole.
+# A comparison costs up to the size of a pair, so a path to a change is compared
+# at most this many times rather than once per level of its depth.
+_MAX_COMPARED_LEVEL = 8
+_SET_GETTERS = frozenset((
+    _get_set_container,
+    _get_frozenset_container,
+    _get_sorted_set_container,
+    _get_sorted_frozenset_container
+))
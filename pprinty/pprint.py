@@ -1,219 +1,2304 @@
-from typing import Any, Optional, TextIO, List
-import dataclasses
+# Modules are imported where they are needed, so that importing the package stays cheap.
+from __future__ import annotations
+import _thread
+import itertools
+import sys
+
+from .registry import _get_renderers
+
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from typing import (
+        Any,
+        Collection,
+        Optional,
+        TextIO,
+        Iterable,
+        Iterator,
+        List,
+        Tuple,
+        Union,
+        Dict,
+        Callable,
+        Set
+    )
+    import array
+    import collections
+    import concurrent.futures
+    import weakref
+
+    from .registry import Renderer, _Renderers
+    from .stats import RenderStats
+
+    # A container getter returns a complete string for an empty container
+    # or (start string, (name, value) items, end string, last line end string, number of items).
+    _Container = Union[str, Tuple[str, Iterator[Tuple[str, Any]], str, str, int]]
+    # A start string, "name=" strings and a getter of values of fields of a record class.
+    _FieldPlan = Tuple[str, Tuple[str, ...], Optional[Callable[[object], Any]]]
+    # A path to a container is (path to its parent, accessor, container, [index]).
+    # An accessor tells how to get the container from its parent, like "[1]", "['key']"
+    # or ".name". The index is of an item of the container being decomposed.
+    _Path = Optional[Tuple["_Path", str, Any, List[int]]]
 
 
 _SENTINEL = object()
+_CHUNK_SIZE = 4096  # Fragments per chunk.
+_WRITE_GROUP_SIZE = 65536  # Characters per write in the stream mode.
+_MAX_PRINTERS = 32  # Printers kept for options of module-level functions.
+_printers = {}
+# threading.Lock is _thread.allocate_lock, which doesn't need threading to be imported.
+_file_locks = None
+_file_locks_lock = _thread.allocate_lock()
+_fallback_file_lock = _thread.allocate_lock()
+
+
+def pprint(
+    value: Any = _SENTINEL,
+    *,
+    indent: int = 4,
+    file: Optional[TextIO] = None,
+    stream: bool = False,
+    references: bool = False,
+    width: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    max_items: Optional[int] = None,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False,
+    sort_keys: bool = False,
+    sort_sets: bool = False,
+    workers: Optional[int] = None,
+    stats: Optional[RenderStats] = None
+) -> None:
+    """Print a decomposed value to sys.stdout or a file.
+
+    :param value: A value to print.
+    :param indent: A number of spaces before a string. Used to decompose containers.
+    :param file: A file-like object to print to a file.
+    :param stream: Write the value chunk by chunk while decomposing it
+        instead of building the whole string in memory.
+    :param references: Decompose a container met more than once only the first time,
+        later occurrences refer to the first one.
+    :param width: A maximum line width. Containers fitting into it are printed on one line.
+        By default, every non-empty container is decomposed.
+    :param max_depth: A maximum number of nested container levels to decompose.
+        Deeper containers are printed as "[...]".
+    :param max_items: A maximum number of items to print of every container.
+        The rest are replaced with "... (N more)" without being decomposed.
+    :param max_string: A maximum number of characters or bytes to print of every string.
+        The rest are replaced with "... (N more)".
+    :param elide_middle: Keep both the start and the end of strings longer than max_string,
+        the middle is replaced with "... (N more) ...".
+    :param sort_keys: Print keys of dicts sorted, see `PrettyPrinter`.
+    :param sort_sets: Print items of sets and frozensets sorted, see `PrettyPrinter`.
+    :param workers: A number of processes to render big containers with (see `PrettyPrinter`).
+    :param stats: Statistics to collect of decomposing, see `RenderStats`.
+    :raises ValueError: If an indent, a width or a limit is less than zero,
+        if workers are less than one or if workers are set with references.
+    """
+    printer = _get_printer(
+        indent=indent,
+        references=references,
+        width=width,
+        max_depth=max_depth,
+        max_items=max_items,
+        max_string=max_string,
+        elide_middle=elide_middle,
+        sort_keys=sort_keys,
+        sort_sets=sort_sets,
+        workers=workers
+    )
+    printer.pprint(value, file=file, stream=stream, stats=stats)
+
+
+def pformat(
+    value: Any,
+    *,
+    indent: int = 4,
+    references: bool = False,
+    width: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    max_items: Optional[int] = None,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False,
+    sort_keys: bool = False,
+    sort_sets: bool = False,
+    workers: Optional[int] = None,
+    stats: Optional[RenderStats] = None
+) -> str:
+    """Decompose a value to a string.
+
+    The string is equal to the one printed by `pprint` without the trailing newline.
+
+    :param value: A value to decompose.
+    :param indent: A number of spaces before a string. Used to decompose containers.
+    :param references: Decompose a container met more than once only the first time,
+        later occurrences refer to the first one.
+    :param width: A maximum line width. Containers fitting into it are printed on one line.
+        By default, every non-empty container is decomposed.
+    :param max_depth: A maximum number of nested container levels to decompose.
+        Deeper containers are printed as "[...]".
+    :param max_items: A maximum number of items to print of every container.
+        The rest are replaced with "... (N more)" without being decomposed.
+    :param max_string: A maximum number of characters or bytes to print of every string.
+        The rest are replaced with "... (N more)".
+    :param elide_middle: Keep both the start and the end of strings longer than max_string,
+        the middle is replaced with "... (N more) ...".
+    :param sort_keys: Print keys of dicts sorted, see `PrettyPrinter`.
+    :param sort_sets: Print items of sets and frozensets sorted, see `PrettyPrinter`.
+    :param workers: A number of processes to render big containers with (see `PrettyPrinter`).
+    :param stats: Statistics to collect of decomposing, see `RenderStats`.
+    :return: A string of the decomposed value.
+    :raises ValueError: If an indent, a width or a limit is less than zero,
+        if workers are less than one or if workers are set with references.
+    """
+    printer = _get_printer(
+        indent=indent,
+        references=references,
+        width=width,
+        max_depth=max_depth,
+        max_items=max_items,
+        max_string=max_string,
+        elide_middle=elide_middle,
+        sort_keys=sort_keys,
+        sort_sets=sort_sets,
+        workers=workers
+    )
+
+    return printer.pformat(value, stats=stats)
+
+
+def iter_pprint(
+    value: Any,
+    *,
+    indent: int = 4,
+    references: bool = False,
+    width: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    max_items: Optional[int] = None,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False,
+    sort_keys: bool = False,
+    sort_sets: bool = False,
+    workers: Optional[int] = None,
+    stats: Optional[RenderStats] = None
+) -> Iterator[str]:
+    """Decompose a value chunk by chunk.
+
+    Joined chunks are equal to the string printed by `pprint` without the trailing newline.
+
+    :param value: A value to decompose.
+    :param indent: A number of spaces before a string. Used to decompose containers.
+    :param references: Decompose a container met more than once only the first time,
+        later occurrences refer to the first one.
+    :param width: A maximum line width. Containers fitting into it are printed on one line.
+        By default, every non-empty container is decomposed.
+    :param max_depth: A maximum number of nested container levels to decompose.
+        Deeper containers are printed as "[...]".
+    :param max_items: A maximum number of items to print of every container.
+        The rest are replaced with "... (N more)" without being decomposed.
+    :param max_string: A maximum number of characters or bytes to print of every string.
+        The rest are replaced with "... (N more)".
+    :param elide_middle: Keep both the start and the end of strings longer than max_string,
+        the middle is replaced with "... (N more) ...".
+    :param sort_keys: Print keys of dicts sorted, see `PrettyPrinter`.
+    :param sort_sets: Print items of sets and frozensets sorted, see `PrettyPrinter`.
+    :param workers: A number of processes to render big containers with (see `PrettyPrinter`).
+    :param stats: Statistics to collect of decomposing, see `RenderStats`.
+    :return: An iterator of string chunks.
+    :raises ValueError: If an indent, a width or a limit is less than zero,
+        if workers are less than one or if workers are set with references.
+    """
+    printer = _get_printer(
+        indent=indent,
+        references=references,
+        width=width,
+        max_depth=max_depth,
+        max_items=max_items,
+        max_string=max_string,
+        elide_middle=elide_middle,
+        sort_keys=sort_keys,
+        sort_sets=sort_sets,
+        workers=workers
+    )
+
+    return printer.iter_pprint(value, stats=stats)
+
+
+class PrettyPrinter:
+    """A reusable printer of decomposed values.
+
+    Options are validated and indents and getters are prepared once,
+    so a printer doesn't repeat any setup for every printed value.
+    """
+
+    def __init__(
+        self,
+        *,
+        indent: int = 4,
+        references: bool = False,
+        width: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        max_items: Optional[int] = None,
+        max_string: Optional[int] = None,
+        elide_middle: bool = False,
+        sort_keys: bool = False,
+        sort_sets: bool = False,
+        cache_size: Optional[int] = None,
+        workers: Optional[int] = None
+    ) -> None:
+        """
+        :param indent: A number of spaces before a string. Used to decompose containers.
+        :param references: Decompose a container met more than once only the first time,
+            later occurrences refer to the first one.
+        :param width: A maximum line width. Containers fitting into it are printed on one line.
+            By default, every non-empty container is decomposed.
+        :param max_depth: A maximum number of nested container levels to decompose.
+            Deeper containers are printed as "[...]".
+        :param max_items: A maximum number of items to print of every container.
+            The rest are replaced with "... (N more)" without being decomposed.
+        :param max_string: A maximum number of characters or bytes to print of every string.
+            The rest are replaced with "... (N more)".
+        :param elide_middle: Keep both the start and the end of strings longer than max_string,
+            the middle is replaced with "... (N more) ...".
+        :param sort_keys: Print keys of dicts sorted. Keys are sorted by their values
+            if they are comparable and otherwise grouped by their types and sorted by values
+            or, for types that aren't comparable, by reprs. Frozensets are sorted
+            by reprs with their items sorted, and NaNs go after other floats.
+        :param sort_sets: Print items of sets and frozensets sorted like keys of dicts,
+            so that they don't depend on hash randomization.
+        :param cache_size: A maximum number of bytes of strings to keep for deeply immutable
+            containers (tuples, frozensets, named tuples and frozen dataclasses of scalars),
+            so that printing the same object again costs only a lookup.
+            By default, nothing is kept. Cannot be used with references or a width.
+        :param workers: A number of processes to render big containers with.
+            Items of the top-level container, or of its items, are split into chunks
+            rendered in a process pool if there are at least 10000 of them.
+            Chunks with values that can't be pickled are rendered in this process.
+            The output is the same as a serial one, except ids in recursion markers
+            and addresses in default reprs (`<... at 0x...>`),
+            which are ones of copies in worker processes.
+            Rendering stays serial while renderers are registered or overridden,
+            since worker processes don't have them. Cannot be used with references.
+        :raises ValueError: If an indent, a width, a limit or a cache size is less than zero,
+            if workers are less than one
+            or if a cache size or workers are set with references (and a cache size with a width).
+        """
+        if indent < 0:
+            raise ValueError("Indent cannot be less than zero!")
+
+        for name, option in (
+            ("Width", width),
+            ("Max depth", max_depth),
+            ("Max items", max_items),
+            ("Max string", max_string),
+            ("Cache size", cache_size)
+        ):
+            if option is not None and option < 0:
+                raise ValueError(f"{name} cannot be less than zero!")
+
+        if cache_size is not None and (references or width is not None):
+            raise ValueError("Cache cannot be used with references or a width!")
+
+        if workers is not None:
+            if workers < 1:
+                raise ValueError("Workers cannot be less than one!")
+
+            if references:
+                raise ValueError("Workers cannot be used with references!")
+
+        # Options of printers in worker processes.
+        self._options = {
+            "indent": indent,
+            "width": width,
+            "max_depth": max_depth,
+            "max_items": max_items,
+            "max_string": max_string,
+            "elide_middle": elide_middle,
+            "sort_keys": sort_keys,
+            "sort_sets": sort_sets
+        }
+
+        self._indent = indent
+        self._references = references
+        self._width = width
+        self._max_depth = sys.maxsize if max_depth is None else max_depth
+        self._max_items = max_items
+        self._prefixes = []
+        self._getters = _BUILT_IN_CONTAINER_GETTERS
+        # Getters of containers of string literals concatenated implicitly.
+        self._concatenated_getters = _CONCATENATED_GETTERS
+
+        if max_string is not None:
+            def get_short_string(value: Union[str, bytes]) -> Union[str, _LeafSlices]:
+                return _get_short_string(value, max_string, elide_middle)
+
+            def get_short_bytearray_container(value: bytearray) -> _Container:
+                return _get_short_bytearray_container(value, max_string, elide_middle)
+
+            self._getters = {
+                **self._getters,
+                str: get_short_string,
+                bytes: get_short_string,
+                bytearray: get_short_bytearray_container
+            }
+            self._concatenated_getters = self._concatenated_getters | {
+                get_short_bytearray_container
+            }
+
+        if sort_keys:
+            self._getters = {
+                **self._getters,
+                dict: _get_sorted_dict_container,
+                ("collections", "defaultdict"): _get_sorted_default_dict_container
+            }
+
+        if sort_sets:
+            self._getters = {
+                **self._getters,
+                set: _get_sorted_set_container,
+                frozenset: _get_sorted_frozenset_container
+            }
+
+        if max_string is not None:
+            import functools
+
+            def limit_keys(get_container: Callable[..., _Container]) -> Callable[..., _Container]:
+                @functools.wraps(get_container)
+                def get_container_with_short_keys(value: Any) -> _Container:
+                    return get_container(value, max_string, elide_middle)
+
+                return get_container_with_short_keys
+
+            self._getters = {
+                type_: limit_keys(getter) if getter in _DICT_GETTERS else getter
+                for type_, getter in self._getters.items()
+            }
+
+        self._dispatchers = {}
+        self._cache = None if cache_size is None else _RenderCache(cache_size)
+        self._workers = workers
+
+    def pprint(
+        self,
+        value: Any = _SENTINEL,
+        *,
+        file: Optional[TextIO] = None,
+        stream: bool = False,
+        stats: Optional[RenderStats] = None
+    ) -> None:
+        """Print a decomposed value to sys.stdout or a file.
+
+        :param value: A value to print.
+        :param file: A file-like object to print to a file.
+        :param stream: Write the value chunk by chunk while decomposing it
+            instead of building the whole string in memory.
+        :param stats: Statistics to collect of decomposing, see `RenderStats`.
+
+        The value is written with a single write while holding a lock of the file,
+        so values printed by several threads to one file never interleave.
+        Values are decomposed outside the lock. In the stream mode,
+        chunks are written in groups, each with its own write.
+        """
+        if file is None:
+            file = sys.stdout
+
+            if file is None:
+                # No console, like with pythonw.
+                return
+
+        if value is _SENTINEL:
+            _write_to_file(file, "\n")
+        elif stream:
+            group = []
+            group_size = 0
+
+            for chunk in self.iter_pprint(value, stats=stats):
+                group.append(chunk)
+                group_size += len(chunk)
+
+                if group_size >= _WRITE_GROUP_SIZE:
+                    _write_to_file(file, "".join(group))
+                    group.clear()
+                    group_size = 0
+
+            group.append("\n")
+            _write_to_file(file, "".join(group))
+        else:
+            _write_to_file(file, self.pformat(value, stats=stats) + "\n")
+
+    def pformat(self, value: Any, *, stats: Optional[RenderStats] = None) -> str:
+        """Decompose a value to a string.
+
+        :param value: A value to decompose.
+        :param stats: Statistics to collect of decomposing, see `RenderStats`.
+        :return: A string of the decomposed value.
+        """
+        if stats is None and value.__class__ in _IMMUTABLE_SCALAR_TYPES:
+            # A scalar printed by a built-in getter is a single string, it takes no walk.
+            getter = self._get_dispatcher(_get_renderers())[value.__class__]
+
+            if getter is self._getters.get(value.__class__, repr):
+                string = getter(value)
+
+                if string.__class__ is str:
+                    return string
+
+        # Fragments are joined chunk by chunk, a short fragment takes
+        # a few times more memory than its characters in a chunk.
+        return "".join(self.iter_pprint(value, stats=stats))
+
+    def iter_pprint(self, value: Any, *, stats: Optional[RenderStats] = None) -> Iterator[str]:
+        """Decompose a value chunk by chunk.
+
+        :param value: A value to decompose.
+        :param stats: Statistics to collect of decomposing, see `RenderStats`.
+        :return: An iterator of string chunks.
+        """
+        buffer = []
+
+        if stats is not None:
+            yield from stats._collect(self._write(value, buffer, _CHUNK_SIZE, stats=stats), buffer)
+            return
+
+        if self._workers is None:
+            for _ in self._write(value, buffer, _CHUNK_SIZE, cache=self._cache):
+                yield "".join(buffer)
+                buffer.clear()
+        else:
+            with _WorkerPool(self._workers) as pool:
+                for _ in self._write(value, buffer, _CHUNK_SIZE, cache=self._cache, pool=pool):
+                    yield "".join(buffer)
+                    buffer.clear()
+
+        if buffer:
+            yield "".join(buffer)
+
+    def _get_prefixes(self, level: int) -> Tuple[str, str, str]:
+        """Get line prefixes of a container level.
+
+        Prefixes of the first levels are built once and kept, deeper ones are built
+        for every container, so that a deep value doesn't leave long strings in the printer.
+
+        :param level: A nesting level of a container.
+        :return: A line separator, an item separator and a closing prefix.
+        """
+        prefixes = self._prefixes
+
+        if level >= _MAX_PREFIX_LEVELS:
+            return _build_prefixes(self._indent, level)
+
+        while len(prefixes) <= level:
+            prefixes.append(_build_prefixes(self._indent, len(prefixes)))
+
+        return prefixes[level]
+
+    def _get_dispatcher(self, renderers: Tuple[_Renderers, _Renderers]) -> "_Dispatcher":
+        try:
+            return self._dispatchers[renderers]
+        except KeyError:
+            if len(self._dispatchers) >= _MAX_DISPATCHERS:
+                self._dispatchers.clear()
+
+            dispatcher = self._dispatchers[renderers] = _Dispatcher(
+                self._getters,
+                {**renderers[0].mapping, **renderers[1].mapping}
+            )
+
+            return dispatcher
+
+    def _get_string(
+        self,
+        value: Any,
+        level: int,
+        name: str = "",
+        path_ids: Collection[int] = ()
+    ) -> str:
+        buffer = []
+        chunks = []
+
+        for _ in self._write(
+            value,
+            buffer,
+            _CHUNK_SIZE,
+            level=level,
+            name=name,
+            path_ids=path_ids
+        ):
+            chunks.append("".join(buffer))
+            buffer.clear()
+
+        chunks.append("".join(buffer))
+
+        return "".join(chunks)
+
+    def _write_parallel(
+        self,
+        append: Callable[[str], None],
+        pool: "_WorkerPool",
+        container: _Container,
+        level: int,
+        ancestor_ids: Set[int]
+    ) -> Iterator[None]:
+        """Append a container rendered by chunks of items in worker processes.
+
+        Only a few chunks are in flight at a time, so that the whole container
+        is never pickled at once. A chunk referring to the container or its parents
+        is rendered here instead, since a worker would get copies of them
+        and decompose them again rather than print recursion.
+
+        :param ancestor_ids: Ids of the container and its parents.
+        """
+        import collections
+        import functools
+
+        start_string, items, end_string, last_line_end_string, size = container
+        line_separator, item_separator, closing_prefix = self._get_prefixes(level)
+        max_items = self._max_items
+
+        if max_items is not None and size > max_items:
+            items = itertools.islice(items, max_items)
+            more_string = f"{item_separator}... ({size - max_items} more)"
+            last_line_end_string = ""
+        else:
+            more_string = ""
+
+        chunk_size = -(-min(size, sys.maxsize if max_items is None else max_items) // (
+            pool.workers * _CHUNKS_PER_WORKER
+        ))
+        # Items are rendered after an indent, so that a layout knows their columns.
+        prefix = line_separator[1:]
+        render = functools.partial(
+            _render_items,
+            self._options,
+            level + 1,
+            prefix,
+            item_separator
+        )
+        # Futures of chunks rendered in workers and strings of chunks rendered here.
+        results = collections.deque()
+        separator = line_separator
+        append(start_string)
+
+        for chunk in iter(lambda: list(itertools.islice(items, chunk_size)), []):
+            data = _pickle_items(chunk, ancestor_ids)
+
+            if data is None:
+                results.append(render(chunk, ancestor_ids))
+            else:
+                results.append(pool.executor.submit(_render_pickled_items, render, data))
+
+            if len(results) >= pool.workers * 2:
+                append(separator)
+                append(_get_result(results.popleft()))
+                separator = item_separator
+                yield
+
+        while results:
+            append(separator)
+            append(_get_result(results.popleft()))
+            separator = item_separator
+            yield
+
+        append(more_string + last_line_end_string + closing_prefix + end_string)
+
+    def _get_scalar_getter(
+        self,
+        value: Any,
+        getters: "_Dispatcher"
+    ) -> Optional[Callable[[Any], str]]:
+        """Get a getter of strings of all items of a container if they are all built-in scalars.
+
+        :return: A getter or None if any item is another value
+            or a scalar printed by a registered renderer.
+        """
+        getter = getters[type(value)]
+
+        if self._max_items is None or getter in _SORTED_GETTERS:
+            # Sorted items to print are known only after all of them are sorted.
+            items = value
+        else:
+            # Only items to print are checked, so the cost doesn't depend on the size.
+            items = list(itertools.islice(value, self._max_items))
+
+        if getter is _get_array_container:
+            # Items of an array are created on iteration, a type code tells their type.
+            types = {_ARRAY_ITEM_TYPES.get(value.typecode, int)}
+        else:
+            types = set(map(type, items))
+
+        if not types <= _IMMUTABLE_SCALAR_TYPES:
+            return None
+
+        for type_ in types:
+            if getters[type_] is not self._getters.get(type_, repr):
+                return None
+
+        if types == {str} or types == {bytes}:
+            if max(map(len, items)) > _LEAF_SLICE_SIZE:
+                # Long strings are written in slices, not in blocks.
+                return None
+        elif (str in types or bytes in types) and any(
+            len(i) > _LEAF_SLICE_SIZE for i in items if type(i) is str or type(i) is bytes
+        ):
+            return None
+
+        if len(types) == 1:
+            getter = getters[types.pop()]
+
+            return repr if getter is _get_leaf_string else getter
+
+        if all(getters[i] is repr or getters[i] is _get_leaf_string for i in types):
+            return repr
+
+        return lambda item: getters[type(item)](item)
+
+    def _is_immutable(self, value: Any, getters: "_Dispatcher") -> bool:
+        """Check that a value and everything printed of it can never change.
+
+        Scalars count only when they are printed by the built-in getters,
+        a registered renderer may depend on anything.
+        """
+        stack = [value]
+        seen_ids = set()
+
+        while stack:
+            value = stack.pop()
+            type_ = type(value)
+            getter = getters[type_]
+
+            if type_ in _IMMUTABLE_SCALAR_TYPES:
+                if getter is not self._getters.get(type_, repr):
+                    return False
+
+                if getter is _get_leaf_string and len(value) > _LEAF_SLICE_SIZE:
+                    # A long string is written in slices, never kept whole.
+                    return False
+            elif getter in _IMMUTABLE_CONTAINER_GETTERS or (
+                getter is _get_dataclass_container
+                and type_.__dataclass_params__.frozen
+            ):
+                if id(value) in seen_ids:
+                    # A recursive value, it's already being checked.
+                    continue
+
+                seen_ids.add(id(value))
+                container = getter(value)
+
+                if container.__class__ is not str:
+                    stack.extend(item for _, item in container[1])
+            else:
+                return False
+
+        return True
+
+    def _write(
+        self,
+        value: Any,
+        buffer: List[str],
+        chunk_size: int,
+        *,
+        level: int = 0,
+        name: str = "",
+        cache: Optional["_RenderCache"] = None,
+        pool: Optional["_WorkerPool"] = None,
+        stats: Optional[RenderStats] = None,
+        path_ids: Collection[int] = ()
+    ) -> Iterator[None]:
+        """Append fragments of a decomposed value to a buffer.
+
+        Containers are walked with an explicit stack instead of recursion,
+        so the nesting depth is limited only by memory.
+        Yields whenever the buffer holds at least `chunk_size` fragments,
+        so that a caller can flush it.
+        Memory doesn't depend on the size of a value, but on its depth and `chunk_size`.
+        On 64-bit CPython an open container costs about 180 bytes: a frame list
+        of 112 bytes and an items iterator (a zip is 64 bytes). A fragment in the buffer
+        costs an 8-byte slot, separators and indents are shared strings from a table,
+        a leaf repr is a string object (50 bytes with one character) until it's joined.
+        Strings and bytes longer than 64 KiB are escaped and written in slices,
+        so a single huge leaf doesn't take a few copies of itself.
+        Deeply immutable containers are rendered once and taken from a cache if it is given.
+        Big containers on the first two levels are rendered in worker processes
+        if a pool is given. With stats, getters are replaced with timed ones,
+        so that the walk itself stays the same.
+
+        :param path_ids: Ids of containers the value is nested in, printed as recursion.
+        """
+        if self._width is None:
+            layout = None
+            append = buffer.append
+        else:
+            layout = _Layout(buffer, self._width)
+            append = layout.write
+
+        renderers = _get_renderers()
+        getters = self._get_dispatcher(renderers)
+
+        if stats is not None:
+            getters = stats._instrument(getters)
+            cache = pool = None
+
+        if cache is not None:
+            cache.check_renderers(renderers)
+
+        if pool is not None and (renderers[0].mapping or renderers[1].mapping):
+            pool = None
+
+        prefixes = self._prefixes
+        references = self._references
+        max_depth = self._max_depth
+        max_items = self._max_items
+        path_ids = set(path_ids)
+        seen = {}
+        # A frame is [items, separator, nested separator, end string, indent level, object, path].
+        # The root value is the single item of a virtual frame.
+        stack = [[iter(((name, value),)), "", "", "", level - 1, None, None]]
+
+        while stack:
+            frame = stack[-1]
+            items, separator, nested_separator, end_string, indent_level, object_, path = frame
+
+            for name, value in items:
+                append(separator)
+                separator = nested_separator
+
+                if name.__class__ is _LeafSlices:
+                    # A long key of a dict.
+                    for string in name:
+                        append(string)
+                        yield
+                else:
+                    append(name)
+
+                getter = getters[type(value)]
+
+                if getter is _get_leaf_string and len(value) <= _LEAF_SLICE_SIZE:
+                    # Most strings are short, their reprs are taken without a call of the getter.
+                    container = repr(value)
+                else:
+                    container = getter(value)
+
+                if container.__class__ is str:
+                    append(container)
+
+                    if len(buffer) >= chunk_size:
+                        yield
+
+                    continue
+
+                if container.__class__ is _LeafSlices:
+                    for string in container:
+                        append(string)
+                        yield
+
+                    continue
+
+                if container.__class__ is not tuple:
+                    # A subclass of str returned by `__repr__` or anything returned by a renderer.
+                    append(str(container))
+
+                    if len(buffer) >= chunk_size:
+                        yield
+
+                    continue
+
+                start_string, nested_items, nested_end_string, last_line_end_string, size = container
+                nested_indent_level = indent_level + 1
+
+                if nested_indent_level >= max_depth:
+                    append(f"{start_string}...{nested_end_string}")
+                    continue
+
+                if cache is not None and getter in _MEMOIZED_GETTERS:
+                    string = cache.get(value, nested_indent_level)
+
+                    if string is None and cache.is_immutable(value, self._is_immutable, getters):
+                        string = self._get_string(value, nested_indent_level)
+                        cache.put(value, nested_indent_level, string)
+
+                    if string is not None:
+                        append(string)
+
+                        if len(buffer) >= chunk_size:
+                            yield
+
+                        continue
+
+                value_id = id(value)
+
+                if value_id in path_ids:
+                    append(f"<Recursion on {type(value).__name__} with id={value_id}>")
+                    continue
+
+                if (
+                    pool is not None
+                    and nested_indent_level <= 1
+                    and size >= _MIN_PARALLEL_SIZE
+                    # A container this big can't fit a line.
+                    and (self._width is None or size * 3 > self._width)
+                    and max_items != 0
+                ):
+                    yield from self._write_parallel(
+                        append,
+                        pool,
+                        container,
+                        nested_indent_level,
+                        path_ids | {value_id}
+                    )
+                    continue
+
+                if references:
+                    if value_id in seen:
+                        append(_get_reference_string(seen[value_id]))
+                        continue
+
+                    nested_path = seen[value_id] = (
+                        path,
+                        _get_accessor(object_, name, path),
+                        value,
+                        [0]
+                    )
+                else:
+                    nested_path = None
+
+                if (
+                    layout is None
+                    and getter in _SCALAR_SEQUENCE_GETTERS
+                    and size >= _MIN_SCALAR_BLOCK_SIZE
+                    and max_items != 0
+                    and type(next(iter(value))) in _IMMUTABLE_SCALAR_TYPES
+                ):
+                    get_scalar_string = self._get_scalar_getter(value, getters)
+
+                    if getter in _SORTED_GETTERS:
+                        import operator
+
+                        scalars = map(operator.itemgetter(1), nested_items)
+                    else:
+                        scalars = value
+                else:
+                    get_scalar_string = None
+
+                    if nested_items.__class__ is _SortedItems:
+                        nested_items = _iter_sorted_items(nested_items.values, getters)
+
+                if max_items is not None and size > max_items:
+                    nested_items = itertools.chain(
+                        itertools.islice(nested_items, max_items),
+                        (("", _Text(f"... ({size - max_items} more)")),)
+                    )
+                    last_line_end_string = ""
+
+                if nested_indent_level < len(prefixes):
+                    line_separator, item_separator, closing_prefix = prefixes[nested_indent_level]
+                else:
+                    line_separator, item_separator, closing_prefix = self._get_prefixes(
+                        nested_indent_level
+                    )
+
+                if get_scalar_string is not None:
+                    # Scalars are formatted in blocks, without a frame and a lookup per item.
+                    append(start_string)
+                    append(line_separator)
+                    if max_items is not None:
+                        scalars = itertools.islice(scalars, max_items)
+
+                    scalars = iter(scalars)
+                    block = list(itertools.islice(scalars, _SCALAR_BLOCK_SIZE))
+                    append(item_separator.join(map(get_scalar_string, block)))
+
+                    while True:
+                        yield
+                        block = list(itertools.islice(scalars, _SCALAR_BLOCK_SIZE))
+
+                        if not block:
+                            break
+
+                        append(item_separator)
+                        append(item_separator.join(map(get_scalar_string, block)))
+
+                    if max_items is not None and size > max_items:
+                        append(item_separator)
+                        append(f"... ({size - max_items} more)")
+
+                    append(last_line_end_string + closing_prefix + nested_end_string)
+                    continue
+
+                if getter in self._concatenated_getters:
+                    # Items are string literals concatenated implicitly.
+                    item_separator = line_separator
+                    inline_item_separator = " "
+                else:
+                    inline_item_separator = ", "
+
+                if nested_path is not None:
+                    nested_items = _iter_counted(nested_items, nested_path[3])
+
+                nested_frame = [
+                    nested_items,
+                    line_separator,
+                    item_separator,
+                    last_line_end_string + closing_prefix + nested_end_string,
+                    nested_indent_level,
+                    value,
+                    nested_path
+                ]
+
+                if layout is None:
+                    append(start_string)
+                else:
+                    append(layout.open_group(
+                        nested_frame,
+                        start_string,
+                        last_line_end_string + nested_end_string,
+                        nested_indent_level,
+                        inline_item_separator
+                    ))
+
+                path_ids.add(value_id)
+                frame[1] = separator
+                stack.append(nested_frame)
+                break
+            else:
+                stack.pop()
+                path_ids.discard(id(object_))
+                append(end_string)
+
+
+def _build_prefixes(indent: int, level: int) -> Tuple[str, str, str]:
+    closing_prefix = "\n" + " " * indent * level
+    line_separator = closing_prefix + " " * indent
+
+    return line_separator, "," + line_separator, closing_prefix
+
+
+def _get_printer(**options: Any) -> PrettyPrinter:
+    key = tuple(options.items())
+    printer = _printers.get(key)
+
+    if printer is None:
+        printer = PrettyPrinter(**options)
+
+        if len(_printers) >= _MAX_PRINTERS:
+            _printers.clear()
+
+        _printers[key] = printer
+
+    return printer
+
+
+def _write_to_file(file: TextIO, string: str) -> None:
+    with _get_file_lock(file):
+        file.write(string)
+
+
+def _get_file_lock(file: TextIO) -> _thread.LockType:
+    global _file_locks
+
+    if _file_locks is None:
+        import weakref
+
+        with _file_locks_lock:
+            if _file_locks is None:
+                _file_locks = weakref.WeakKeyDictionary()
+
+    try:
+        return _file_locks[file]
+    except KeyError:
+        with _file_locks_lock:
+            return _file_locks.setdefault(file, _thread.allocate_lock())
+    except TypeError:
+        # Files that can't be weakly referenced or hashed share a lock.
+        return _fallback_file_lock
+
+
+class _WorkerPool:
+    """A process pool started on first use."""
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor = None
+
+    @property
+    def executor(self) -> "concurrent.futures.ProcessPoolExecutor":
+        if self._executor is None:
+            import concurrent.futures
+
+            self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+
+        return self._executor
+
+    def __enter__(self) -> "_WorkerPool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+def _render_items(
+    options: Dict[str, Any],
+    level: int,
+    prefix: str,
+    separator: str,
+    items: List[Tuple[str, Any]],
+    path_ids: Collection[int] = ()
+) -> str:
+    printer = _get_printer(**options)
+
+    # Names of long keys are joined, since a chunk is returned as a whole anyway.
+    return separator.join(
+        printer._get_string(
+            value,
+            level,
+            prefix + (name if name.__class__ is str else "".join(name)),
+            path_ids
+        )[len(prefix):]
+        for name, value in items
+    )
+
+
+def _render_pickled_items(render: Callable[[List[Tuple[str, Any]]], str], data: bytes) -> str:
+    # Runs in a worker process.
+    import pickle
+
+    return render(pickle.loads(data))
+
+
+def _pickle_items(items: List[Tuple[str, Any]], ancestor_ids: Set[int]) -> Optional[bytes]:
+    """Pickle items to render in a worker.
+
+    :return: A pickle or None if the items refer to one of the ancestors
+        or can't be pickled, like locks or instances of local classes.
+    """
+    import io
+    import pickle
+
+    def check_object(object_: Any) -> None:
+        if id(object_) in ancestor_ids:
+            raise _AncestorFound
+
+    file = io.BytesIO()
+    pickler = pickle.Pickler(file, pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = check_object
+
+    try:
+        pickler.dump(items)
+    except (_AncestorFound, pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+    return file.getvalue()
+
+
+def _get_result(result: Union[str, "concurrent.futures.Future[str]"]) -> str:
+    return result if result.__class__ is str else result.result()
+
+
+class _AncestorFound(Exception):
+    pass
+
+
+# Kinds of layout tokens.
+_GROUP_START = 0
+_GROUP_SEPARATOR = 1
+_GROUP_END = 2
+
+
+class _Group:
+    __slots__ = ("is_top", "start_total", "end_total", "limit", "is_flat")
+
+    def __init__(self, is_top: bool) -> None:
+        self.is_top = is_top
+        self.start_total = 0
+        self.end_total = None
+        self.limit = None
+        self.is_flat = None
+
+
+class _Layout:
+    """Lay out containers inline when they fit into a width and line by line otherwise.
+
+    The walker writes strings and tokens of container groups. A group is undecided
+    until it ends within the space left on its line (it's inline) or grows wider
+    than the space left (it's decomposed). Only fragments of undecided groups
+    are held back, so every fragment is measured once and no more than a line
+    of fragments is kept in memory.
+
+    On 64-bit CPython a held fragment costs an 8-byte slot of a deque and a group
+    costs 288 bytes: a `_Group` and its start, separator and end tokens, 72 bytes each.
+    Separators and end tokens are shared by all items of a group.
+    """
+
+    def __init__(self, buffer: List[str], width: int) -> None:
+        import collections
+
+        self._append = buffer.append
+        self._width = width
+        self._column = 0
+        self._total = 0  # A length of all written fragments as if they were inline.
+        self._pending = collections.deque()
+        self._undecided = collections.deque()
+
+    def open_group(
+        self,
+        frame: list,
+        start_string: str,
+        inline_end_string: str,
+        indent_level: int,
+        inline_item_separator: str = ", "
+    ) -> Tuple[int, _Group, str, str]:
+        """Replace separators of a frame with tokens of a new group.
+
+        :return: A token starting the group.
+        """
+        group = _Group(is_top=indent_level == 0)
+        line_separator = frame[1]
+        frame[1] = (_GROUP_SEPARATOR, group, line_separator, "")
+        frame[2] = (_GROUP_SEPARATOR, group, frame[2], inline_item_separator)
+        frame[3] = (_GROUP_END, group, frame[3], inline_end_string)
+
+        return _GROUP_START, group, start_string, start_string
+
+    def write(self, fragment: Union[str, Tuple[int, _Group, str, str]]) -> None:
+        if fragment.__class__ is str:
+            undecided = self._undecided
+
+            if undecided:
+                self._pending.append(fragment)
+                self._total += len(fragment)
+
+                if self._total > undecided[0].limit:
+                    self._decompose_overflowing()
+            else:
+                self._emit(fragment)
+
+            return
+
+        kind, group, line_string, inline_string = fragment
+
+        if group.is_flat is False:
+            self._emit(line_string)
+            return
+
+        if kind == _GROUP_START:
+            group.start_total = self._total
+            self._total += len(inline_string)
+
+            if self._undecided:
+                self._pending.append(fragment)
+            else:
+                self._set_limit(group)
+                self._emit(inline_string)
+
+            self._undecided.append(group)
+        else:
+            self._total += len(inline_string)
+            self._pending.append(fragment)
+
+            if kind == _GROUP_END:
+                group.end_total = self._total
+
+                if self._undecided[0] is group and self._total <= group.limit:
+                    self._inline(group)
+                    self._emit_pending()
+                    return
+
+        self._decompose_overflowing()
+
+    def _set_limit(self, group: _Group) -> None:
+        space = self._width - self._column - (0 if group.is_top else 1)  # A comma after a line.
+        group.limit = group.start_total + space
+
+    def _inline(self, group: _Group) -> None:
+        # The group and its nested groups are the first undecided ones.
+        undecided = self._undecided
+
+        while undecided and undecided[0].start_total < group.end_total:
+            undecided.popleft().is_flat = True
+
+    def _decompose_overflowing(self) -> None:
+        undecided = self._undecided
+
+        while undecided and self._total > undecided[0].limit:
+            undecided.popleft().is_flat = False
+            self._emit_pending()
+
+    def _emit_pending(self) -> None:
+        pending = self._pending
+
+        while pending:
+            fragment = pending[0]
+
+            if fragment.__class__ is str:
+                self._emit(fragment)
+            else:
+                kind, group, line_string, inline_string = fragment
+
+                if group.is_flat is None:
+                    # The first undecided group starts here, now its column is known.
+                    self._set_limit(group)
+
+                    if group.end_total is None:
+                        return
+
+                    if group.end_total <= group.limit:
+                        self._inline(group)
+                    else:
+                        self._undecided.popleft().is_flat = False
+
+                self._emit(inline_string if group.is_flat else line_string)
+
+            pending.popleft()
+
+    def _emit(self, string: str) -> None:
+        self._append(string)
+        newline_index = string.rfind("\n")
+
+        if newline_index == -1:
+            self._column += len(string)
+        else:
+            self._column = len(string) - newline_index - 1
+
+
+class _RenderCache:
+    """Strings of deeply immutable containers by their identity and nesting level.
+
+    Entries are evicted in least recently used order to keep the total size
+    of strings within a limit. A weak reference to a container is kept where possible,
+    otherwise a container is kept alive while its entry is, so its id cannot be reused.
+    Containers found to be mutable are remembered too, they never become immutable.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._size = 0
+        import collections
+
+        self._entries = collections.OrderedDict()
+        self._renderers = None
+
+    def check_renderers(self, renderers: Tuple[_Renderers, _Renderers]) -> None:
+        # Strings rendered with other renderers are stale.
+        if renderers != self._renderers:
+            self._entries.clear()
+            self._size = 0
+            self._renderers = renderers
+
+    def get(self, value: Any, level: int) -> Optional[str]:
+        key = id(value), level
+        entry = self._entries.get(key)
+
+        if entry is None or self._get_object(entry) is not value:
+            return None
+
+        self._entries.move_to_end(key)
+
+        return entry[1]
+
+    def is_immutable(
+        self,
+        value: Any,
+        check: Callable[[Any, "_Dispatcher"], bool],
+        getters: "_Dispatcher"
+    ) -> bool:
+        key = id(value), None
+        entry = self._entries.get(key)
+
+        if entry is not None and self._get_object(entry) is value:
+            return False
+
+        if check(value, getters):
+            return True
+
+        self._add(key, value, None, _MUTABLE_ENTRY_SIZE)
 
+        return False
 
-def pprint(value: Any = _SENTINEL, *, indent: int = 4, file: Optional[TextIO] = None) -> None:
-    """Print a decomposed value to sys.stdout or a file.
+    def put(self, value: Any, level: int, string: str) -> None:
+        self._add((id(value), level), value, string, sys.getsizeof(string))
 
-    :param value: A value to print.
-    :param indent: A number of spaces before a string. Used to decompose containers.
-    :param file: A file-like object to print to a file.
-    :raises ValueError: If an indent is less than zero.
+    def _add(
+        self,
+        key: Tuple[int, Optional[int]],
+        value: Any,
+        string: Optional[str],
+        size: int
+    ) -> None:
+        if size > self._max_size:
+            return
+
+        import weakref
+
+        try:
+            reference = weakref.ref(value, lambda reference: self._discard(key, reference))
+        except TypeError:
+            # Tuples and objects with __slots__ cannot be weakly referenced.
+            reference = None
+
+        self._discard(key)
+        self._entries[key] = (reference, string, size, None if reference else value)
+        self._size += size
+
+        while self._size > self._max_size:
+            _, (_, _, evicted_size, _) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def _discard(
+        self,
+        key: Tuple[int, Optional[int]],
+        reference: Optional[weakref.ref] = None
+    ) -> None:
+        entry = self._entries.get(key)
+
+        # A dead reference removes only its own entry, not a newer one with the same id.
+        if entry is not None and (reference is None or entry[0] is reference):
+            del self._entries[key]
+            self._size -= entry[2]
+
+    @staticmethod
+    def _get_object(entry: Tuple[Optional[weakref.ref], Optional[str], int, Any]) -> Any:
+        reference = entry[0]
+
+        return entry[3] if reference is None else reference()
+
+
+def _get_reference_string(path: _Path) -> str:
+    value = path[2]
+    accessors = []
+
+    while path is not None:
+        path, accessor, _, _ = path
+        accessors.append(accessor)
+
+    return f"<Reference to {type(value).__name__} at {''.join(reversed(accessors))}>"
+
+
+def _get_accessor(object_: Any, name: str, path: _Path) -> str:
+    """Get an accessor of an item of a container from its name or its index.
+
+    :param path: A path to the container, with an index of the item.
     """
-    if indent < 0:
-        raise ValueError("Indent cannot be less than zero!")
+    if name.__class__ is _LeafSlices:
+        name = "".join(name)
 
-    if value is not _SENTINEL:
-        print(
-            _get_string(value, indent=indent),
-            file=file
-        )
+    if name.endswith(": "):
+        return f"[{name[:-2]}]"
+
+    if name:
+        return f".{name[:-1]}"
+
+    if object_ is None:
+        return ""
+
+    if isinstance(object_, (set, frozenset)):
+        return "{...}"
+
+    return f"[{path[3][0]}]"
+
+
+def _iter_counted(items: Iterator[Tuple[str, Any]], index: List[int]) -> Iterator[Tuple[str, Any]]:
+    # The index is kept up to date, so a path to an item is built without a search.
+    for index[0], item in enumerate(items):
+        yield item
+
+
+def _get_list_container(object_: list) -> _Container:
+    if not object_:
+        return "[]"
+
+    return "[", zip(itertools.repeat(""), object_), "]", "", len(object_)
+
+
+def _get_dict_container(
+    object_: dict,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False
+) -> _Container:
+    if not object_:
+        return "{}"
+
+    return (
+        "{",
+        zip(_iter_key_names(object_, max_string, elide_middle), object_.values()),
+        "}",
+        "",
+        len(object_)
+    )
+
+
+def _iter_key_names(
+    keys: Iterable[Any],
+    max_string: Optional[int],
+    elide_middle: bool
+) -> Iterator[Union[str, _LeafSlices]]:
+    """Get "key: " names of keys of a dict.
+
+    Keys that are long strings or bytes are cut to max_string
+    and escaped in slices like values.
+    """
+    max_size = _LEAF_SLICE_SIZE if max_string is None else min(max_string, _LEAF_SLICE_SIZE)
+
+    for key in keys:
+        if (key.__class__ is str or key.__class__ is bytes) and len(key) > max_size:
+            yield _get_long_key_name(key, max_string, elide_middle)
+        else:
+            yield f"{key!r}: "
+
+
+def _get_long_key_name(
+    key: Union[str, bytes],
+    max_string: Optional[int],
+    elide_middle: bool
+) -> Union[str, _LeafSlices]:
+    if max_string is None:
+        string = _get_leaf_string(key)
     else:
-        print(file=file)
+        string = _get_short_string(key, max_string, elide_middle)
+
+    if string.__class__ is str:
+        return string + ": "
+
+    return _LeafSlices((*string._parts, ": "))
+
+
+def _get_tuple_container(object_: tuple) -> _Container:
+    if not object_:
+        return "()"
+
+    size = len(object_)
+
+    return "(", zip(itertools.repeat(""), object_), ")", "," if size == 1 else "", size
+
+
+def _get_set_container(object_: set) -> _Container:
+    if not object_:
+        return "set()"
+
+    return "{", zip(itertools.repeat(""), object_), "}", "", len(object_)
+
+
+def _get_frozenset_container(object_: frozenset) -> _Container:
+    if not object_:
+        return "frozenset()"
+
+    return "frozenset({", zip(itertools.repeat(""), object_), "})", "", len(object_)
+
+
+def _get_dataclass_container(object_: object) -> _Container:
+    plan = _field_plans.get(type(object_))
+
+    if plan is None:
+        plan = _get_dataclass_plan(type(object_))
+
+    return _get_planned_container(object_, plan)
+
+
+def _get_attrs_container(object_: object) -> _Container:
+    plan = _field_plans.get(type(object_))
+
+    if plan is None:
+        plan = _get_attrs_plan(type(object_))
+
+    return _get_planned_container(object_, plan)
+
+
+def _get_planned_container(object_: object, plan: _FieldPlan) -> _Container:
+    start_string, names, get_values = plan
+
+    if get_values is None:
+        return start_string + ")"
+
+    try:
+        values = get_values(object_)
+    except AttributeError:
+        # A field without a default that wasn't set, record representations fail on it.
+        return _get_partial_container(object_, start_string, names)
 
+    if len(names) == 1:
+        values = (values,)
 
-def _get_indent(value: int, level: int) -> str:
-    return " " * value * level
+    return start_string, zip(names, values), ")", "", len(names)
 
 
-def _get_total_string(
+def _get_dataclass_plan(type_: type) -> _FieldPlan:
+    """Get a plan of printing instances of a dataclass, built once per class.
+
+    :return: A start string, "name=" strings of fields shown by the dataclass representation
+        and a getter of their values or None if there are no such fields.
+    """
+    import dataclasses
+
+    return _add_field_plan(type_, [i.name for i in dataclasses.fields(type_) if i.repr])
+
+
+def _get_attrs_plan(type_: type) -> _FieldPlan:
+    """Get a plan of printing instances of an attrs class, built once per class.
+
+    Fields are taken from the class itself, so attrs is never imported here.
+    A field with a callable `repr` is printed as the string it returns.
+
+    :return: See `_get_dataclass_plan`.
+    """
+    import functools
+
+    fields = [i for i in type_.__attrs_attrs__ if i.repr]
+    plan = _add_field_plan(type_, [i.name for i in fields])
+    start_string, names, get_values = plan
+    field_reprs = tuple(i.repr if callable(i.repr) else None for i in fields)
+
+    if any(field_reprs):
+        get_values = functools.partial(_get_rendered_values, get_values, field_reprs)
+        plan = _field_plans[type_] = start_string, names, get_values
+
+    return plan
+
+
+def _get_rendered_values(
+    get_values: Callable[[object], Any],
+    field_reprs: Tuple[Optional[Callable[[Any], str]], ...],
+    object_: object
+) -> Any:
+    values = get_values(object_)
+
+    if len(field_reprs) == 1:
+        return _Text(field_reprs[0](values))
+
+    return tuple(
+        value if field_repr is None else _Text(field_repr(value))
+        for value, field_repr in zip(values, field_reprs)
+    )
+
+
+def _add_field_plan(type_: type, field_names: List[str]) -> _FieldPlan:
+    import operator
+
+    plan = (
+        f"{type_.__name__}(",
+        tuple(map("{}=".format, field_names)),
+        operator.attrgetter(*field_names) if field_names else None
+    )
+
+    if len(_field_plans) >= _MAX_DISPATCH_CACHE_SIZE:
+        del _field_plans[next(iter(_field_plans))]
+
+    _field_plans[type_] = plan
+
+    return plan
+
+
+def _get_partial_container(
+    object_: object,
     start_string: str,
-    lines: List[str],
-    end_string: str,
-    indent: int,
-    indent_level: int,
-    no_line_string: Optional[str] = None
-) -> str:
-    if lines:
-        return (
-            start_string
-            + "\n"
-            + ",\n".join(lines)
-            + "\n"
-            + _get_indent(indent, indent_level)
-            + end_string
+    names: Tuple[str, ...]
+) -> _Container:
+    items = [
+        (name, getattr(object_, name[:-1]))
+        for name in names
+        if hasattr(object_, name[:-1])
+    ]
+
+    if not items:
+        return start_string + ")"
+
+    return start_string, iter(items), ")", "", len(items)
+
+
+def _get_fields_container(object_: object) -> _Container:
+    """Get a container of an object that lists its fields with `__pprinty_fields__`.
+
+    The method returns an iterable of (name, value) pairs, printed like fields of a dataclass.
+    """
+    items = [(f"{name}=", value) for name, value in object_.__pprinty_fields__()]
+    start_string = f"{type(object_).__name__}("
+
+    if not items:
+        return start_string + ")"
+
+    return start_string, iter(items), ")", "", len(items)
+
+
+def _get_pydantic_container(object_: object) -> _Container:
+    # Fields shown by the model representation, the same in pydantic 1 and 2.
+    # They are taken from every model, since a model allowing extra fields has its own ones,
+    # and their "name=" strings are kept per class.
+    type_ = type(object_)
+    plan = _pydantic_plans.get(type_)
+
+    if plan is None:
+        if len(_pydantic_plans) >= _MAX_DISPATCH_CACHE_SIZE:
+            del _pydantic_plans[next(iter(_pydantic_plans))]
+
+        plan = _pydantic_plans[type_] = f"{type_.__name__}(", {}
+
+    start_string, names = plan
+    items = []
+
+    for name, value in object_.__repr_args__():
+        if name is not None:
+            name_string = names.get(name)
+
+            if name_string is None:
+                name_string = f"{name}="
+
+                if len(names) < _MAX_DISPATCH_CACHE_SIZE:
+                    names[name] = name_string
+
+            items.append((name_string, value))
+
+    if not items:
+        return start_string + ")"
+
+    return start_string, iter(items), ")", "", len(items)
+
+
+def _get_namespace_container(object_: object) -> _Container:
+    type_ = type(object_)
+    start_string = "namespace(" if type_.__module__ == "types" else f"{type_.__name__}("
+    fields = vars(object_)
+
+    if not fields:
+        return start_string + ")"
+
+    return start_string, zip(map("{}=".format, fields), fields.values()), ")", "", len(fields)
+
+
+def _get_leaf_string(value: Union[str, bytes, bytearray]) -> Union[str, _LeafSlices]:
+    if len(value) <= _LEAF_SLICE_SIZE:
+        return repr(value)
+
+    return _LeafSlices(((value, 0, len(value)),))
+
+
+def _get_short_string(
+    value: Union[str, bytes, bytearray],
+    max_string: int,
+    elide_middle: bool
+) -> Union[str, _LeafSlices]:
+    size = len(value)
+
+    if size <= max_string:
+        return _get_leaf_string(value)
+
+    end_size = max_string // 2 if elide_middle else 0
+
+    if end_size:
+        parts = (
+            (value, 0, max_string - end_size),
+            f"... ({size - max_string} more) ...",
+            (value, size - end_size, size)
         )
-    elif no_line_string is not None:
-        return no_line_string
+    else:
+        parts = ((value, 0, max_string), f"... ({size - max_string} more)")
 
-    return f"{start_string}{end_string}"
+    if max_string > _LEAF_SLICE_SIZE:
+        return _LeafSlices(parts)
 
+    return "".join(
+        part if part.__class__ is str else repr(value[part[1]:part[2]])
+        for part in parts
+    )
 
-def _get_string(
-    value: Any,
-    *,
-    indent: int,
-    indent_level: int = 0
-) -> str:
-    type_ = type(value)
 
-    if type_ in _BUILT_IN_CONTAINER_GETTERS:
-        getter = _BUILT_IN_CONTAINER_GETTERS[type_]
-        string = getter(value, indent, indent_level)
-    elif dataclasses.is_dataclass(type_):
-        string = _get_dataclass_string(value, indent, indent_level)
+class _LeafSlices:
+    """Reprs of parts of a long string or bytes, escaped slice by slice.
+
+    A repr of a whole string takes a few times more memory than the string
+    and is copied again when it's joined, slices are written one by one instead.
+    A quote is chosen for a whole part, like `repr` does.
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, parts: Tuple[Union[str, Tuple[Any, int, int]], ...]) -> None:
+        """
+        :param parts: Strings written as is and (value, start index, end index) parts of a value.
+        """
+        self._parts = parts
+
+    def __iter__(self) -> Iterator[str]:
+        for part in self._parts:
+            if part.__class__ is str:
+                yield part
+            else:
+                yield from _iter_repr_slices(*part)
+
+
+def _iter_repr_slices(value: Union[str, bytes, bytearray], start: int, end: int) -> Iterator[str]:
+    if isinstance(value, str):
+        single_quote, double_quote = "'", '"'
     else:
-        string = repr(value)
+        single_quote, double_quote = b"'", b'"'
 
-    return string
+    if value.find(single_quote, start, end) != -1 and value.find(double_quote, start, end) == -1:
+        quote = '"'
+        marker = single_quote
+    else:
+        quote = "'"
+        marker = double_quote
 
+    # With the other quote added, a repr of any slice is quoted like a repr of the whole part.
+    # A repr of the marker alone tells where escaped characters of a slice start and end.
+    marker_string = repr(value[:0] + marker)
+    body_start = marker_string.index(quote) + 1
+    body_end = body_start - len(marker_string)
+    string = marker_string[:body_start]
 
-def _get_list_string(object_: list, indent: int, indent_level: int) -> str:
-    lines = []
+    for i in range(start, end, _LEAF_SLICE_SIZE):
+        yield string + repr(value[i:min(i + _LEAF_SLICE_SIZE, end)] + marker)[body_start:body_end]
+        string = ""
 
-    if object_:
-        nested_indent_level = indent_level + 1
+    yield string + marker_string[marker_string.rindex(quote):]
 
-        for i in object_:
-            lines.append(
-                _get_indent(indent, nested_indent_level)
-                + _get_string(i, indent=indent, indent_level=nested_indent_level)
-            )
 
-    return _get_total_string(
-        start_string="[",
-        lines=lines,
-        end_string="]",
-        indent=indent,
-        indent_level=indent_level
+class _Text(str):
+    """A string printed as is."""
+
+
+def _get_namedtuple_container(object_: tuple) -> _Container:
+    start_string = f"{type(object_).__name__}("
+
+    if not object_:
+        return f"{start_string})"
+
+    return start_string, zip(map("{}=".format, object_._fields), object_), ")", "", len(object_)
+
+
+def _get_ordered_dict_container(
+    object_: collections.OrderedDict,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False
+) -> _Container:
+    type_name = type(object_).__name__
+
+    if not object_:
+        return f"{type_name}()"
+
+    return (
+        f"{type_name}({{",
+        zip(_iter_key_names(object_, max_string, elide_middle), object_.values()),
+        "})",
+        "",
+        len(object_)
     )
 
 
-def _get_dict_string(object_: dict, indent: int, indent_level: int) -> str:
-    lines = []
+def _get_default_dict_container(
+    object_: collections.defaultdict,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False
+) -> _Container:
+    start_string = f"{type(object_).__name__}({object_.default_factory!r}, {{"
 
-    if object_:
-        nested_indent_level = indent_level + 1
+    if not object_:
+        return f"{start_string}}})"
 
-        for key, value in object_.items():
-            key_string = repr(key)
-            value_string = _get_string(value, indent=indent, indent_level=nested_indent_level)
-            lines.append(
-                _get_indent(indent, nested_indent_level) + f"{key_string}: {value_string}"
-            )
+    return (
+        start_string,
+        zip(_iter_key_names(object_, max_string, elide_middle), object_.values()),
+        "})",
+        "",
+        len(object_)
+    )
 
-    return _get_total_string(
-        start_string="{",
-        lines=lines,
-        end_string="}",
-        indent=indent,
-        indent_level=indent_level
+
+def _get_counter_container(
+    object_: collections.Counter,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False
+) -> _Container:
+    type_name = type(object_).__name__
+
+    if not object_:
+        return f"{type_name}()"
+
+    items = object_.most_common()
+    names = _iter_key_names((key for key, _ in items), max_string, elide_middle)
+
+    return (
+        f"{type_name}({{",
+        ((name, value) for name, (_, value) in zip(names, items)),
+        "})",
+        "",
+        len(items)
     )
 
 
-def _get_tuple_string(object_: tuple, indent: int, indent_level: int) -> str:
-    lines = []
+def _get_deque_container(object_: collections.deque) -> _Container:
+    type_name = type(object_).__name__
+    end_string = ")" if object_.maxlen is None else f", maxlen={object_.maxlen})"
 
-    if object_:
-        nested_indent_level = indent_level + 1
+    if not object_:
+        return f"{type_name}([]{end_string}"
 
-        for i in object_:
-            lines.append(
-                _get_indent(indent, nested_indent_level)
-                + _get_string(i, indent=indent, indent_level=nested_indent_level)
-            )
+    return f"{type_name}([", zip(itertools.repeat(""), object_), f"]{end_string}", "", len(object_)
 
-        if len(lines) == 1:
-            lines = [f"{lines[0]},"]
 
-    return _get_total_string(
-        start_string="(",
-        lines=lines,
-        end_string=")",
-        indent=indent,
-        indent_level=indent_level
+def _get_hex_rows(object_: memoryview) -> Iterator[Tuple[str, _Text]]:
+    for i in range(0, object_.nbytes, _HEX_ROW_SIZE):
+        yield "", _Text(f"'{_get_hex_string(object_[i:i + _HEX_ROW_SIZE])}'")
+
+
+def _get_hex_string(object_: memoryview) -> str:
+    # A separator can be passed to hex() only since Python 3.8.
+    string = object_.hex()
+
+    return " ".join([string[i:i + 2] for i in range(0, len(string), 2)])
+
+
+def _get_bytearray_container(object_: bytearray) -> _Container:
+    if len(object_) <= _HEX_ROW_SIZE:
+        return repr(object_)
+
+    return (
+        f"{type(object_).__name__}.fromhex(",
+        _get_hex_rows(memoryview(object_)),
+        ")",
+        "",
+        -(-len(object_) // _HEX_ROW_SIZE)
     )
 
 
-def _get_set_string(object_: set, indent: int, indent_level: int) -> str:
-    lines = []
+def _get_short_bytearray_container(
+    object_: bytearray,
+    max_string: int,
+    elide_middle: bool
+) -> _Container:
+    size = len(object_)
 
-    if object_:
-        nested_indent_level = indent_level + 1
+    if size <= _HEX_ROW_SIZE:
+        return _get_short_string(object_, max_string, elide_middle)
 
-        for i in object_:
-            lines.append(
-                _get_indent(indent, nested_indent_level)
-                + _get_string(i, indent=indent, indent_level=nested_indent_level)
-            )
+    if size <= max_string:
+        return _get_bytearray_container(object_)
 
-    return _get_total_string(
-        start_string="{",
-        lines=lines,
-        end_string="}",
-        indent=indent,
-        indent_level=indent_level,
-        no_line_string="set()"
+    end_size = max_string // 2 if elide_middle else 0
+    start_size = max_string - end_size
+    view = memoryview(object_)
+    items = [
+        _get_hex_rows(view[:start_size]),
+        (("", _Text(f"... ({size - max_string} more)")),)
+    ]
+
+    if end_size:
+        items.append(_get_hex_rows(view[size - end_size:]))
+
+    return (
+        f"{type(object_).__name__}.fromhex(",
+        itertools.chain.from_iterable(items),
+        ")",
+        "",
+        -(-start_size // _HEX_ROW_SIZE) - (-end_size // _HEX_ROW_SIZE) + 1
     )
 
 
-def _get_frozenset_string(object_: frozenset, indent: int, indent_level: int) -> str:
-    lines = []
+def _get_memoryview_container(object_: memoryview) -> _Container:
+    if (
+        object_.__repr__().startswith("<released")
+        or not object_.c_contiguous
+        or object_.format.lstrip("@") not in _CASTABLE_FORMATS
+    ):
+        # Released or strided views have no plain bytes to show,
+        # and views of other formats, like "<i", can't be cast back.
+        return repr(object_)
+
+    if object_.format == "B" and object_.ndim == 1:
+        end_string = "))"
+    elif object_.ndim == 1:
+        end_string = f")).cast({object_.format!r})"
+    else:
+        end_string = f")).cast({object_.format!r}, {list(object_.shape)})"
 
-    if object_:
-        nested_indent_level = indent_level + 1
+    object_ = object_.cast("B")
 
-        for i in object_:
-            lines.append(
-                _get_indent(indent, nested_indent_level)
-                + _get_string(i, indent=indent, indent_level=nested_indent_level)
-            )
+    if object_.nbytes <= _HEX_ROW_SIZE:
+        return f"memoryview(bytes.fromhex('{_get_hex_string(object_)}'{end_string}"
 
-    return _get_total_string(
-        start_string="frozenset({",
-        lines=lines,
-        end_string="})",
-        indent=indent,
-        indent_level=indent_level,
-        no_line_string="frozenset()"
+    return (
+        "memoryview(bytes.fromhex(",
+        _get_hex_rows(object_),
+        end_string,
+        "",
+        -(-object_.nbytes // _HEX_ROW_SIZE)
     )
 
 
-def _get_dataclass_string(object_: object, indent: int, indent_level: int) -> str:
-    lines = []
-    nested_indent_level = indent_level + 1
+def _get_array_container(object_: array.array) -> _Container:
+    if not object_:
+        return repr(object_)
 
-    if hasattr(object_, "__slots__"):
-        object_data = {
-            i: getattr(object_, i)
-            for i in object_.__slots__
-            if hasattr(object_, i)
-        }
+    return (
+        f"{type(object_).__name__}({object_.typecode!r}, [",
+        zip(itertools.repeat(""), object_),
+        "])",
+        "",
+        len(object_)
+    )
+
+
+def _get_ndarray_container(object_: Any) -> _Container:
+    if object_.ndim == 0 or object_.dtype.hasobject or not object_.size:
+        return repr(object_)
+
+    if object_.dtype.name in _DEFAULT_NUMPY_TYPES:
+        end_string = "])"
     else:
-        object_data = vars(object_)
+        end_string = f"], dtype={object_.dtype.name})"
 
-    for name, value in object_data.items():
-        value_string = _get_string(value, indent=indent, indent_level=nested_indent_level)
-        lines.append(
-            _get_indent(indent, nested_indent_level) + f"{name}={value_string}"
+    if object_.ndim == 1:
+        # Numbers are converted in blocks instead of being boxed into NumPy scalars one by one.
+        items = (
+            ("", _Text(repr(item)))
+            for i in range(0, len(object_), _SCALAR_BLOCK_SIZE)
+            for item in object_[i:i + _SCALAR_BLOCK_SIZE].tolist()
         )
+    else:
+        # Only one row at a time is converted to nested lists.
+        items = (("", row.tolist()) for row in object_)
 
-    return _get_total_string(
-        start_string=f"{type(object_).__name__}(",
-        lines=lines,
-        end_string=")",
-        indent=indent,
-        indent_level=indent_level,
+    return "array([", items, end_string, "", len(object_)
+
+
+def _sort(values: Iterable[Any]) -> List[Tuple[Any, Optional[str]]]:
+    """Sort values the same way in every process.
+
+    Values are compared directly if they can be. Otherwise they are grouped by type
+    and every group is sorted by values or, if its values aren't comparable, by reprs.
+    Sets and frozensets are only partially ordered by comparisons and NaNs aren't
+    ordered at all, so sets are always sorted by reprs with their items sorted,
+    NaNs are put after other floats and tuples, which can hold both, are sorted
+    by keys built from their items (see `_get_sort_key`).
+
+    :return: Values with their reprs, if they were needed for sorting, or None.
+    """
+    values = list(values)
+    types = set(map(type, values))
+    is_ordered = not any(issubclass(i, (set, frozenset, tuple)) for i in types)
+
+    if is_ordered and any(issubclass(i, float) for i in types):
+        is_ordered = not any(isinstance(i, float) and i != i for i in values)
+
+    if is_ordered:
+        try:
+            values.sort()
+        except TypeError:
+            pass
+        else:
+            return list(zip(values, itertools.repeat(None)))
+
+    groups = {}
+
+    for value in values:
+        groups.setdefault(type(value), []).append(value)
+
+    sorted_values = []
+
+    for type_ in sorted(groups, key=_get_type_key):
+        group = groups[type_]
+
+        if issubclass(type_, (set, frozenset)):
+            reprs = list(map(_get_sorted_repr, group))
+            sorted_values.extend(sorted(zip(group, reprs), key=lambda item: item[1]))
+            continue
+
+        if issubclass(type_, tuple):
+            try:
+                group.sort(key=_get_sort_key)
+            except TypeError:
+                group.sort(key=lambda value: _get_sort_key(value, by_repr=True))
+
+            sorted_values.extend(zip(group, itertools.repeat(None)))
+            continue
+
+        try:
+            if issubclass(type_, float):
+                group.sort(key=lambda value: (value != value, value))
+            else:
+                group.sort()
+        except TypeError:
+            reprs = list(map(repr, group))
+            sorted_values.extend(sorted(zip(group, reprs), key=lambda item: item[1]))
+        else:
+            sorted_values.extend(zip(group, itertools.repeat(None)))
+
+    return sorted_values
+
+
+def _get_type_key(type_: type) -> Tuple[str, str]:
+    return type_.__module__, type_.__qualname__
+
+
+def _get_sort_key(value: Any, by_repr: bool = False) -> Tuple[Tuple[str, str], bool, Any]:
+    """Get a key ordering values totally, unlike comparisons of tuples holding sets or NaNs.
+
+    Keys are ordered by types of values first, but all numbers are compared together.
+    Tuples are ordered by keys of their items, sets by reprs with their items sorted
+    and NaNs are put after other numbers.
+
+    :param by_repr: Whether values of other types are ordered by reprs instead of values,
+        for those that aren't comparable.
+    """
+    if isinstance(value, (bool, int, float)):
+        if value != value:
+            return _NUMBER_TYPE_KEY, True, 0.0
+
+        return _NUMBER_TYPE_KEY, False, value
+
+    type_key = _get_type_key(type(value))
+
+    if isinstance(value, tuple):
+        return type_key, False, tuple(_get_sort_key(i, by_repr) for i in value)
+
+    if isinstance(value, (set, frozenset)):
+        return type_key, False, _get_sorted_repr(value)
+
+    return type_key, False, repr(value) if by_repr else value
+
+
+def _get_sorted_repr(object_: Union[set, frozenset]) -> str:
+    # A repr of a set with its items sorted, which doesn't depend on hash randomization.
+    if not object_:
+        return repr(object_)
+
+    items = ", ".join(
+        repr(value) if value_repr is None else value_repr
+        for value, value_repr in _sort(object_)
+    )
+
+    if type(object_) is set:
+        return f"{{{items}}}"
+
+    return f"{type(object_).__name__}({{{items}}})"
+
+
+def _get_sorted_dict_items(
+    object_: dict,
+    max_string: Optional[int],
+    elide_middle: bool
+) -> Iterator[Tuple[Union[str, _LeafSlices], Any]]:
+    max_size = _LEAF_SLICE_SIZE if max_string is None else min(max_string, _LEAF_SLICE_SIZE)
+
+    for key, key_repr in _sort(object_):
+        if key_repr is not None:
+            # Keys sorted by their reprs aren't strings or bytes.
+            yield f"{key_repr}: ", object_[key]
+        elif (key.__class__ is str or key.__class__ is bytes) and len(key) > max_size:
+            yield _get_long_key_name(key, max_string, elide_middle), object_[key]
+        else:
+            yield f"{key!r}: ", object_[key]
+
+
+def _get_sorted_dict_container(
+    object_: dict,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False
+) -> _Container:
+    if not object_:
+        return "{}"
+
+    return "{", _get_sorted_dict_items(object_, max_string, elide_middle), "}", "", len(object_)
+
+
+def _get_sorted_default_dict_container(
+    object_: collections.defaultdict,
+    max_string: Optional[int] = None,
+    elide_middle: bool = False
+) -> _Container:
+    start_string = f"{type(object_).__name__}({object_.default_factory!r}, {{"
+
+    if not object_:
+        return f"{start_string}}})"
+
+    return (
+        start_string,
+        _get_sorted_dict_items(object_, max_string, elide_middle),
+        "})",
+        "",
+        len(object_)
     )
 
 
+def _get_sorted_set_container(object_: set) -> _Container:
+    if not object_:
+        return "set()"
+
+    return "{", _SortedItems(_sort(object_)), "}", "", len(object_)
+
+
+def _get_sorted_frozenset_container(object_: frozenset) -> _Container:
+    if not object_:
+        return "frozenset()"
+
+    return "frozenset({", _SortedItems(_sort(object_)), "})", "", len(object_)
+
+
+class _SortedItems:
+    """An iterator of items of a sorted set, keeping reprs its values were sorted by."""
+
+    __slots__ = ("values", "_items")
+
+    def __init__(self, values: List[Tuple[Any, Optional[str]]]) -> None:
+        self.values = values
+        self._items = (("", value) for value, _ in values)
+
+    def __iter__(self) -> _SortedItems:
+        return self
+
+    def __next__(self) -> Tuple[str, Any]:
+        return next(self._items)
+
+
+def _iter_sorted_items(
+    values: List[Tuple[Any, Optional[str]]],
+    getters: _Dispatcher
+) -> Iterator[Tuple[str, Any]]:
+    # Values printed with repr are printed with reprs taken for sorting, not with new ones.
+    for value, value_repr in values:
+        if value_repr is not None and getters[type(value)] is repr:
+            yield "", _Text(value_repr)
+        else:
+            yield "", value
+
+
 _BUILT_IN_CONTAINER_GETTERS = {
-    list: _get_list_string,
-    dict: _get_dict_string,
-    tuple: _get_tuple_string,
-    set: _get_set_string,
-    frozenset: _get_frozenset_string
+    _Text: str,
+    list: _get_list_container,
+    dict: _get_dict_container,
+    tuple: _get_tuple_container,
+    set: _get_set_container,
+    frozenset: _get_frozenset_container,
+    bytearray: _get_bytearray_container,
+    memoryview: _get_memoryview_container,
+    str: _get_leaf_string,
+    bytes: _get_leaf_string,
+    # Getters of types of modules that are never imported here are keyed
+    # by module and type names, values of these types can only come from a program that did it.
+    ("collections", "OrderedDict"): _get_ordered_dict_container,
+    ("collections", "defaultdict"): _get_default_dict_container,
+    ("collections", "Counter"): _get_counter_container,
+    ("collections", "deque"): _get_deque_container,
+    ("array", "array"): _get_array_container,
+    ("types", "SimpleNamespace"): _get_namespace_container
 }
+_MAX_DISPATCH_CACHE_SIZE = 1024
+_field_plans = {}
+# Getters of dicts, taking max_string and elide_middle for keys.
+_DICT_GETTERS = frozenset((
+    _get_dict_container,
+    _get_ordered_dict_container,
+    _get_default_dict_container,
+    _get_counter_container,
+    _get_sorted_dict_container,
+    _get_sorted_default_dict_container
+))
+_pydantic_plans = {}
+_IMMUTABLE_SCALAR_TYPES = frozenset((int, float, complex, bool, str, bytes, type(None)))
+_IMMUTABLE_CONTAINER_GETTERS = frozenset((
+    _get_tuple_container,
+    _get_frozenset_container,
+    _get_sorted_frozenset_container,
+    _get_namedtuple_container
+))
+_MEMOIZED_GETTERS = _IMMUTABLE_CONTAINER_GETTERS | {_get_dataclass_container}
+_SCALAR_SEQUENCE_GETTERS = frozenset((
+    _get_list_container,
+    _get_tuple_container,
+    _get_set_container,
+    _get_frozenset_container,
+    _get_deque_container,
+    _get_array_container,
+    _get_sorted_set_container,
+    _get_sorted_frozenset_container
+))
+_SORTED_GETTERS = frozenset((_get_sorted_set_container, _get_sorted_frozenset_container))
+_CONCATENATED_GETTERS = frozenset((_get_bytearray_container, _get_memoryview_container))
+_LEAF_SLICE_SIZE = 65536  # Characters or bytes of a long string escaped at once.
+_HEX_ROW_SIZE = 16  # Bytes per row of a hex dump.
+# Native single character formats, the only ones a memoryview can be cast to.
+_CASTABLE_FORMATS = frozenset("cbB?hHiIlLqQnNfdP")
+_ARRAY_ITEM_TYPES = {"f": float, "d": float, "u": str, "w": str}
+_DEFAULT_NUMPY_TYPES = frozenset(("int64", "float64", "complex128", "bool"))
+_SCALAR_BLOCK_SIZE = 1024  # Scalars formatted at once.
+_MIN_SCALAR_BLOCK_SIZE = 16  # Smaller containers don't pay off a check of item types.
+_NUMBER_TYPE_KEY = ("", "")  # A key of numbers of all types in `_get_sort_key`.
+_MAX_PREFIX_LEVELS = 32  # Levels of containers with line prefixes kept by a printer.
+_MIN_PARALLEL_SIZE = 10000  # Items of a container worth worker processes.
+_CHUNKS_PER_WORKER = 8
+_MUTABLE_ENTRY_SIZE = 64  # An estimate of memory kept by a remembered mutable container.
+_MAX_DISPATCHERS = 16  # Per printer, one for every set of renderers.
+
+
+class _Dispatcher(dict):
+    """A cache of getters by value type, filled on first sight of a type.
+
+    A getter returns a string of a value or a container (see `_Container`).
+    """
+
+    def __init__(
+        self,
+        getters: Dict[type, Callable[[Any], _Container]],
+        renderers: Dict[type, Renderer]
+    ) -> None:
+        super().__init__({_Text: str})
+        self._getters = getters
+        self._renderers = renderers
+
+    def __missing__(self, type_: type) -> Callable[[Any], _Container]:
+        getter = _resolve_getter(type_, self._getters, self._renderers)
+
+        if len(self) >= _MAX_DISPATCH_CACHE_SIZE:
+            del self[next(iter(self))]
+
+        self[type_] = getter
+
+        return getter
+
+
+def _resolve_getter(
+    type_: type,
+    getters: Dict[type, Callable[[Any], _Container]],
+    renderers: Dict[type, Renderer]
+) -> Callable[[Any], _Container]:
+    mro = type_.__mro__
+
+    if renderers:
+        for i in mro:
+            if i in renderers:
+                return renderers[i]
+
+    if any("__pprinty_fields__" in vars(i) for i in mro):
+        return _get_fields_container
+
+    if any("__dataclass_fields__" in vars(i) for i in mro):
+        return _get_dataclass_container
+
+    if any("__attrs_attrs__" in vars(i) for i in mro):
+        return _get_attrs_container
+
+    if issubclass(type_, tuple) and isinstance(getattr(type_, "_fields", None), tuple):
+        return _get_namedtuple_container
+
+    # NumPy is never imported here, its arrays can only come from a program that did it.
+    numpy = sys.modules.get("numpy")
+    pydantic = sys.modules.get("pydantic")
+
+    if pydantic is not None and issubclass(type_, pydantic.BaseModel):
+        return _get_pydantic_container
+
+    if numpy is not None and issubclass(type_, numpy.ndarray):
+        return _get_ndarray_container
+
+    for i in mro:
+        if i in getters:
+            return getters[i]
+
+        getter = getters.get((i.__module__, i.__qualname__))
+
+        if getter is not None:
+            return getter
+
+        if "__repr__" in vars(i):
+            # A subclass with its own representation.
+            break
+
+    return repr
@@ -0,0 +1,110 @@
+from __future__ import annotations
+import contextvars
+
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+    Renderer = Callable[[Any], str]
+    _RendererT = TypeVar("_RendererT", bound=Renderer)
+
+
+class _Renderers:
+    """An immutable mapping of types to renderers.
+
+    It's replaced on every change, so it's hashed by identity
+    to key caches of getters built with it.
+    """
+
+    __slots__ = ("mapping",)
+
+    def __init__(self, mapping: Dict[type, Renderer]) -> None:
+        self.mapping = mapping
+
+
+_registered_renderers = _Renderers({})
+_overridden_renderers = contextvars.ContextVar("overridden_renderers", default=_Renderers({}))
+
+
+def register(type_: type, renderer: Optional[_RendererT] = None) -> Any:
+    """Register a renderer of a type and its subclasses.
+
+    Can be used as a decorator: `@register(Money)`.
+
+    :param type_: A type of values to render.
+    :param renderer: A function returning a string of a value.
+    :return: The renderer or a decorator registering a renderer.
+    """
+    global _registered_renderers
+
+    if renderer is None:
+        return lambda renderer: register(type_, renderer)
+
+    _registered_renderers = _Renderers({**_registered_renderers.mapping, type_: renderer})
+
+    return renderer
+
+
+def unregister(type_: type) -> None:
+    """Unregister a renderer of a type.
+
+    :param type_: A type a renderer is registered for.
+    :raises ValueError: If no renderer is registered for a type.
+    """
+    global _registered_renderers
+
+    if type_ not in _registered_renderers.mapping:
+        raise ValueError(f"No renderer is registered for {type_!r}!")
+
+    _registered_renderers = _Renderers({
+        key: value
+        for key, value in _registered_renderers.mapping.items()
+        if key is not type_
+    })
+
+
+def override(type_: type, renderer: Renderer) -> _Override:
+    """Use a renderer of a type and its subclasses within a context.
+
+    Overrides are local to a thread or an asyncio task
+    and take precedence over registered renderers.
+
+    :param type_: A type of values to render.
+    :param renderer: A function returning a string of a value.
+    :return: A context manager.
+    """
+    return _Override(type_, renderer)
+
+
+class _Override:
+    """A context manager of an overridden renderer.
+
+    It's a class rather than a contextlib generator, so that contextlib isn't imported.
+    """
+
+    def __init__(self, type_: type, renderer: Renderer) -> None:
+        self._type = type_
+        self._renderer = renderer
+        self._tokens = []
+
+    def __enter__(self) -> None:
+        renderers = _Renderers({**_overridden_renderers.get().mapping, self._type: self._renderer})
+        self._tokens.append(_overridden_renderers.set(renderers))
+
+    def __exit__(self, *args: Any) -> None:
+        _overridden_renderers.reset(self._tokens.pop())
+
+
+def _get_renderers() -> Tuple[_Renderers, _Renderers]:
+    return _registered_renderers, _overridden_renderers.get()
+
+
+def __getattr__(name: str) -> Any:
+    # Type aliases are built on first access, so that typing isn't imported with the package.
+    if name == "Renderer":
+        from typing import Any, Callable
+
+        return Callable[[Any], str]
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
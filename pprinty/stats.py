@@ -0,0 +1,239 @@
+from __future__ import annotations
+import time
+
+from .pprint import _LeafSlices
+
+TYPE_CHECKING = False
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+    from .pprint import _Container, _Dispatcher
+
+
+class NodeStats:
+    """Counters of printed values of a type or printed by a getter."""
+
+    __slots__ = ("nodes", "characters", "time")
+
+    def __init__(self) -> None:
+        self.nodes = 0
+        self.characters = 0  # Of own strings, start and end strings of containers.
+        self.time = 0.0  # Seconds spent in getters, like `repr`, and in escaping long strings.
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(nodes={self.nodes}, characters={self.characters}, "
+            f"time={self.time:.6f})"
+        )
+
+
+class RenderStats:
+    """Statistics of printing, collected when given to a printing function.
+
+    Values are printed through an instrumented table of getters,
+    so printing without statistics doesn't pay for them.
+    A getter is a function taking a string or a container of a value of some type:
+    `repr`, a renderer or a built-in getter of containers.
+    With statistics, everything is rendered serially, without a cache
+    and item by item, so the numbers show where rendering takes time.
+    Statistics of several calls add up.
+    """
+
+    def __init__(self) -> None:
+        self.time = 0.0  # Seconds of rendering.
+        self.characters = 0  # Of the whole output.
+        self.max_depth = 0  # The deepest level of decomposed containers.
+        self._depth = 0
+        self._records = {}
+
+    @property
+    def getter_time(self) -> float:
+        """Seconds spent in getters."""
+        return sum(i.time for i in self._records.values())
+
+    @property
+    def layout_time(self) -> float:
+        """Seconds spent walking containers and laying out their strings."""
+        return self.time - self.getter_time
+
+    @property
+    def by_type(self) -> Dict[type, NodeStats]:
+        """Counters of printed values by their types."""
+        return self._group(lambda type_, getter_name: type_)
+
+    @property
+    def by_getter(self) -> Dict[str, NodeStats]:
+        """Counters of printed values by qualified names of getters."""
+        return self._group(lambda type_, getter_name: getter_name)
+
+    def __str__(self) -> str:
+        lines = [
+            f"Time: {self.time:.6f} s (getters {self.getter_time:.6f} s, "
+            f"layout {self.layout_time:.6f} s)",
+            f"Characters: {self.characters}",
+            f"Max depth: {self.max_depth}"
+        ]
+
+        for title, groups in (("Type", self.by_type), ("Getter", self.by_getter)):
+            lines.append(f"{'Nodes':>10} {'Characters':>12} {'Time, s':>10}  {title}")
+
+            for key, record in sorted(groups.items(), key=lambda i: -i[1].time):
+                name = key if isinstance(key, str) else f"{key.__module__}.{key.__qualname__}"
+                lines.append(
+                    f"{record.nodes:>10} {record.characters:>12} {record.time:>10.6f}  {name}"
+                )
+
+        return "\n".join(lines)
+
+    def _group(self, get_key: Callable[[type, str], Any]) -> Dict[Any, NodeStats]:
+        groups = {}
+
+        for (type_, getter_name), record in self._records.items():
+            group = groups.get(get_key(type_, getter_name))
+
+            if group is None:
+                group = groups[get_key(type_, getter_name)] = NodeStats()
+
+            group.nodes += record.nodes
+            group.characters += record.characters
+            group.time += record.time
+
+        return groups
+
+    def _instrument(self, getters: _Dispatcher) -> _InstrumentedDispatcher:
+        return _InstrumentedDispatcher(self, getters)
+
+    def _collect(self, steps: Iterator[None], buffer: List[str]) -> Iterator[str]:
+        """Time rendering of a value and count characters of its chunks.
+
+        :param steps: A walk appending fragments of the value to a buffer.
+        """
+        start_time = time.perf_counter()
+
+        for _ in steps:
+            chunk = "".join(buffer)
+            buffer.clear()
+            self.time += time.perf_counter() - start_time
+            self.characters += len(chunk)
+            yield chunk
+            start_time = time.perf_counter()
+
+        self.time += time.perf_counter() - start_time
+
+        if buffer:
+            chunk = "".join(buffer)
+            buffer.clear()
+            self.characters += len(chunk)
+            yield chunk
+
+    def _get_record(self, type_: type, getter: Callable[[Any], _Container]) -> NodeStats:
+        key = type_, getattr(getter, "__qualname__", None) or type(getter).__qualname__
+        record = self._records.get(key)
+
+        if record is None:
+            record = self._records[key] = NodeStats()
+
+        return record
+
+    def _iter_items(self, items: Iterator[Tuple[str, Any]]) -> Iterator[Tuple[str, Any]]:
+        # Items of a container are iterated while it's decomposed,
+        # iterators of its parents are suspended meanwhile.
+        self._depth += 1
+
+        if self._depth > self.max_depth:
+            self.max_depth = self._depth
+
+        try:
+            yield from items
+        finally:
+            self._depth -= 1
+
+
+class _InstrumentedDispatcher(dict):
+    """A table of timed getters, filled on first sight of a type."""
+
+    def __init__(self, stats: RenderStats, getters: _Dispatcher) -> None:
+        super().__init__()
+        self._stats = stats
+        self._getters = getters
+
+    def __missing__(self, type_: type) -> Callable[[Any], _Container]:
+        getter = self._getters[type_]
+
+        if getter is not str:
+            # Strings of limits, like "... (N more)", are printed as is.
+            getter = _TimedGetter(self._stats, getter, self._stats._get_record(type_, getter))
+
+        self[type_] = getter
+
+        return getter
+
+
+class _TimedGetter:
+    """A getter counting values it gets strings or containers of.
+
+    It's equal to the getter it wraps, so that the walker recognizes
+    getters of special containers.
+    """
+
+    __slots__ = ("_stats", "_getter", "_record")
+
+    def __init__(
+        self,
+        stats: RenderStats,
+        getter: Callable[[Any], _Container],
+        record: NodeStats
+    ) -> None:
+        self._stats = stats
+        self._getter = getter
+        self._record = record
+
+    def __call__(self, value: Any) -> _Container:
+        record = self._record
+        start_time = time.perf_counter()
+        container = self._getter(value)
+        record.time += time.perf_counter() - start_time
+        record.nodes += 1
+
+        if container.__class__ is str:
+            record.characters += len(container)
+        elif container.__class__ is tuple:
+            start_string, items, end_string, last_line_end_string, size = container
+            record.characters += len(start_string) + len(end_string)
+            container = (
+                start_string,
+                self._stats._iter_items(items),
+                end_string,
+                last_line_end_string,
+                size
+            )
+        elif container.__class__ is _LeafSlices:
+            # Slices of a long string, escaped while they are written.
+            container = _LeafSlices(self._iter_slices(container))
+        else:
+            container = str(container)
+            record.characters += len(container)
+
+        return container
+
+    def __eq__(self, other: object) -> bool:
+        return other is self or other == self._getter
+
+    def __hash__(self) -> int:
+        return hash(self._getter)
+
+    def _iter_slices(self, slices: Iterator[str]) -> Iterator[str]:
+        record = self._record
+        slices = iter(slices)
+
+        while True:
+            start_time = time.perf_counter()
+            string = next(slices, None)
+            record.time += time.perf_counter() - start_time
+
+            if string is None:
+                return
+
+            record.characters += len(string)
+            yield string
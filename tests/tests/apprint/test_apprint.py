@@ -0,0 +1,114 @@
+from typing import Any, List
+from pathlib import Path
+import os
+import sys
+import asyncio
+import subprocess
+
+import pytest
+
+from pprinty import apprint, pformat, override, RenderStats
+
+
+class AsyncWriter:
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+
+    async def write(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+
+
+class BytesWriter:
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+        self.drains = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+
+    async def drain(self) -> None:
+        self.drains += 1
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        1,
+        "строка",
+        {"a": [1, 2, (3,)], "b": {"c": "d"}},
+        [{"key": [i, str(i)]} for i in range(10000)]
+    )
+)
+def test_apprint(value: Any) -> None:
+    writer = AsyncWriter()
+    asyncio.run(apprint(value, writer, indent=2))
+
+    assert "".join(writer.chunks) == pformat(value, indent=2) + "\n"
+
+
+def test_apprint_to_bytes_writer() -> None:
+    value = [{"key": [i, "ключ"]} for i in range(10000)]
+    writer = BytesWriter()
+    asyncio.run(apprint(value, writer, encoding="utf-8"))
+
+    assert b"".join(writer.chunks) == (pformat(value) + "\n").encode()
+    assert writer.drains == len(writer.chunks) > 2
+
+
+def test_apprint_with_stats() -> None:
+    value = {"a": [1, 2], "b": "c"}
+    writer = AsyncWriter()
+    stats = RenderStats()
+    asyncio.run(apprint(value, writer, stats=stats))
+
+    assert stats.characters == len(pformat(value))
+    assert stats.by_type[int].nodes == 2
+    assert stats.max_depth == 2
+
+
+def test_apprint_with_override() -> None:
+    writer = AsyncWriter()
+
+    async def main() -> None:
+        with override(int, lambda x: "int"):
+            await apprint([1], writer, width=80)
+
+    asyncio.run(main())
+
+    assert "".join(writer.chunks) == "[int]\n"
+
+
+def test_apprint_keeps_loop_responsive() -> None:
+    value = [{"key": [i, str(i)]} for i in range(30000)]
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    async def main() -> None:
+        ticker = asyncio.create_task(tick())
+        await apprint(value, AsyncWriter())
+        ticker.cancel()
+
+    asyncio.run(main())
+
+    assert ticks > 10
+
+
+def test_apprint_after_import_of_its_module() -> None:
+    code = (
+        "import pprinty._apprint, pprinty; "
+        "from pprinty import apprint; "
+        "assert apprint is pprinty.apprint is pprinty._apprint.apprint"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PYTHONPATH": str(Path(__file__).parents[3])},
+        check=True
+    )
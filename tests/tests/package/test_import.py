@@ -0,0 +1,71 @@
+from pathlib import Path
+from typing import Dict
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+IMPORT_TIME_BUDGET = 20000  # Microseconds.
+DEFERRED_MODULES = (
+    "typing",
+    "dataclasses",
+    "asyncio",
+    "collections",
+    "functools",
+    "threading",
+    "concurrent.futures",
+    "numpy",
+    "attr",
+    "pydantic"
+)
+
+
+@pytest.fixture
+def environment(tmp_path: Path) -> Dict[str, str]:
+    environment = {
+        key: value
+        for key, value in os.environ.items()
+        if key != "PYTHONDONTWRITEBYTECODE"
+    }
+    # Bytecode is written to a temporary directory, so only the first import compiles.
+    environment["PYTHONPYCACHEPREFIX"] = str(tmp_path)
+    environment["PYTHONPATH"] = str(Path(__file__).parents[3])
+
+    return environment
+
+
+def test_import_time(environment: Dict[str, str]) -> None:
+    import_times = []
+
+    for _ in range(3):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import pprinty"],
+            env=environment,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        _, cumulative_time, name = process.stderr.splitlines()[-1].split("|")
+        assert name.strip() == "pprinty"
+        import_times.append(int(cumulative_time))
+
+    assert min(import_times) < IMPORT_TIME_BUDGET
+
+
+def test_import_defers_modules(environment: Dict[str, str]) -> None:
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, pprinty; print(*sorted(sys.modules), sep='\\n')"
+        ],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    modules = set(process.stdout.splitlines())
+
+    assert modules.isdisjoint(DEFERRED_MODULES)
@@ -0,0 +1,211 @@
+from dataclasses import dataclass
+from typing import Any
+import sys
+
+import pytest
+
+from pprinty import pdiff, override
+
+
+@dataclass
+class Point:
+    x: int
+    y: Any
+
+
+class Unprintable:
+
+    def __repr__(self) -> str:
+        raise AssertionError("Unchanged item is printed!")
+
+
+PDIFF_TEST_DATA = (
+    ("old", "new", "expected_result"),
+    (
+        (1, 2, "-1\n+2"),
+        (1, 1.0, "-1\n+1.0"),
+        ([1], (1,), "-[\n-  1\n-]\n+(\n+  1,\n+)"),
+        (
+            {"a": 1, "b": [1, 2, 3], "c": "d"},
+            {"a": 1, "b": [1, 4, 3], "e": None},
+            (
+                " {\n"
+                "   ... (1 unchanged),\n"
+                "   'b': [\n"
+                "     ... (1 unchanged),\n"
+                "-    2,\n"
+                "+    4,\n"
+                "     ... (1 unchanged)\n"
+                "   ],\n"
+                "-  'c': 'd',\n"
+                "+  'e': None\n"
+                " }"
+            )
+        ),
+        (
+            [0, 1, 2, 3, 4],
+            [0, 1, 9, 2, 3, 4],
+            (
+                " [\n"
+                "   ... (2 unchanged),\n"
+                "+  9,\n"
+                "   ... (3 unchanged)\n"
+                " ]"
+            )
+        ),
+        (
+            [0, 1, 2, 3],
+            [0, 3],
+            (
+                " [\n"
+                "   ... (1 unchanged),\n"
+                "-  1,\n"
+                "-  2,\n"
+                "   ... (1 unchanged)\n"
+                " ]"
+            )
+        ),
+        (
+            Point(1, {2, 3}),
+            Point(1, {2, 4}),
+            (
+                " Point(\n"
+                "   ... (1 unchanged),\n"
+                "   y={\n"
+                "     ... (1 unchanged),\n"
+                "-    3,\n"
+                "+    4\n"
+                "   }\n"
+                " )"
+            )
+        ),
+        (
+            (1,),
+            (2,),
+            (
+                " (\n"
+                "-  1,\n"
+                "+  2,\n"
+                " )"
+            )
+        ),
+        (
+            {"a": [1]},
+            {"a": {"b": [2]}},
+            (
+                " {\n"
+                "-  'a': [\n"
+                "-    1\n"
+                "-  ]\n"
+                "+  'a': {\n"
+                "+    'b': [\n"
+                "+      2\n"
+                "+    ]\n"
+                "+  }\n"
+                " }"
+            )
+        ),
+        (
+            bytearray(32),
+            bytearray(16) + bytearray(b"\x01") + bytearray(15),
+            (
+                " bytearray.fromhex(\n"
+                "   ... (1 unchanged)\n"
+                "-  '00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00'\n"
+                "+  '01 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00'\n"
+                " )"
+            )
+        )
+    )
+)
+
+
+@pytest.mark.parametrize(*PDIFF_TEST_DATA)
+def test_pdiff(old: Any, new: Any, expected_result: str) -> None:
+    assert pdiff(old, new, indent=2) == expected_result
+
+
+def test_equal_values() -> None:
+    value = {"a": [Unprintable()]}
+
+    assert pdiff(value, value) == ""
+    assert pdiff([1, {"a": 2}], [1, {"a": 2}]) == ""
+
+
+def test_unchanged_items_are_not_printed() -> None:
+    unprintable = Unprintable()
+    old = {"a": [unprintable] * 1000, "b": 1}
+    new = {"a": old["a"], "b": 2}
+
+    assert pdiff(old, new, indent=2) == " {\n   ... (1 unchanged),\n-  'b': 1\n+  'b': 2\n }"
+
+
+def test_options() -> None:
+    assert pdiff({"a": [1]}, {"a": [1, 2]}, indent=2, width=80) == (
+        " {\n"
+        "   'a': [\n"
+        "     ... (1 unchanged),\n"
+        "+    2\n"
+        "   ]\n"
+        " }"
+    )
+    assert pdiff([1], [[2, [3]]], indent=2, max_depth=2) == (
+        " [\n"
+        "-  1\n"
+        "+  [\n"
+        "+    2,\n"
+        "+    [...]\n"
+        "+  ]\n"
+        " ]"
+    )
+
+
+def test_renderers() -> None:
+    with override(Point, lambda point: f"<{point.x}>"):
+        assert pdiff([Point(1, 2)], [Point(3, 2)], indent=2) == " [\n-  <1>\n+  <3>\n ]"
+
+
+def test_recursion() -> None:
+    old = [1]
+    old.append(old)
+    new = [2]
+    new.append(new)
+
+    assert pdiff(old, new, indent=2) == " [\n-  1,\n+  2,\n   ... (1 unchanged)\n ]"
+
+
+def test_deep_nesting() -> None:
+    depth = sys.getrecursionlimit() * 2
+    old = [1]
+    new = [2]
+
+    for _ in range(depth - 1):
+        old = [old]
+        new = [new]
+
+    lines = pdiff(old, new, indent=0).split("\n")
+
+    assert len(lines) == depth * 2 + 2
+    assert lines[depth - 1:depth + 3] == [" [", "-1", "+2", " ]"]
+
+
+def test_deep_pairs_are_walked() -> None:
+    # Pairs on deep levels aren't compared as a whole, equal ones are found by walking them.
+    old = {"x": [1, [2]], "y": 1}
+    new = {"x": [1, [2]], "y": 2}
+
+    for _ in range(11):
+        old = {"a": old, "b": [0]}
+        new = {"a": new, "b": [0]}
+
+    lines = pdiff(old, new, indent=0).split("\n")
+
+    assert lines[:12] == [" {"] + [" 'a': {"] * 11
+    assert lines[12:17] == [
+        " ... (1 unchanged),",
+        "-'y': 1",
+        "+'y': 2",
+        " },",
+        " ... (1 unchanged)"
+    ]
+    assert len(lines) == 38
@@ -1,10 +1,18 @@
-from typing import Any
-from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+from dataclasses import dataclass, field
 from pathlib import Path
+import os
+import sys
+import array
+import threading
+import time
+import subprocess
+import collections
+import types
 
 import pytest
 
-from pprinty import pprint
+from pprinty import pprint, pformat, iter_pprint, PrettyPrinter, RenderStats, override
 from tests.stdout_context import StdoutContext
 
 
@@ -31,6 +39,71 @@ class BatDataclass:
     c: BazDataclass
 
 
+class BazDataclassSubclass(BazDataclass):
+    pass
+
+
+class FooNamedTuple(NamedTuple):
+    a: int
+    b: str
+
+
+@dataclass
+class HiddenFieldDataclass:
+    a: int
+    b: str = field(default="b", repr=False)
+
+
+@dataclass
+class SlotsDataclass:
+    __slots__ = ("a", "b")
+    a: int
+    b: int
+
+
+@dataclass(frozen=True)
+class FrozenDataclass:
+    a: Any
+    b: tuple
+
+
+class FieldsObject:
+
+    def __init__(self, a: Any) -> None:
+        self.a = a
+
+    def __pprinty_fields__(self) -> List[Any]:
+        return [("a", self.a), ("double", self.a * 2)]
+
+
+@dataclass
+class FieldsDataclass:
+    a: int
+
+    def __pprinty_fields__(self) -> List[Any]:
+        return [("shown", self.a)]
+
+
+class FooList(list):
+    pass
+
+
+class BarList(list):
+
+    def __repr__(self) -> str:
+        return f"BarList({super().__repr__()})"
+
+
+class Markup(str):
+    pass
+
+
+class MarkupRepr:
+
+    def __repr__(self) -> str:
+        return Markup("<markup>")
+
+
 BEHAVIOR_TEST_DATA = (
     ("value", "indent", "expected_result"),
     (
@@ -649,6 +722,313 @@ PRINT_TO_FILE_TEST_DATA = (
     )
 )
 
+WIDTH_TEST_DATA = (
+    ("value", "width", "expected_result"),
+    (
+        # Container fitting into the width
+        (
+            [1, 2],
+            6,
+            "[1, 2]\n"
+        ),
+
+        # Container not fitting into the width
+        (
+            [1, 2],
+            5,
+            (
+                "[\n"
+                "  1,\n"
+                "  2\n"
+                "]\n"
+            )
+        ),
+
+        # Nested container fitting into the width with a comma after it
+        (
+            [[1, 2], 3],
+            10,
+            (
+                "[\n"
+                "  [1, 2],\n"
+                "  3\n"
+                "]\n"
+            )
+        ),
+
+        # Nested container not fitting into the width with a comma after it
+        (
+            [[1, 2], 3],
+            8,
+            (
+                "[\n"
+                "  [\n"
+                "    1,\n"
+                "    2\n"
+                "  ],\n"
+                "  3\n"
+                "]\n"
+            )
+        ),
+
+        # Inline containers of every kind
+        (
+            {"a": (1,), "b": {2}, "c": frozenset({3}), "d": BazDataclass(4, "e"), "f": set()},
+            200,
+            "{'a': (1,), 'b': {2}, 'c': frozenset({3}), 'd': BazDataclass(a=4, b='e'), 'f': set()}\n"
+        ),
+
+        # Dict value starting after a key
+        (
+            {"key": [1, 2], "k": [1, 2]},
+            14,
+            (
+                "{\n"
+                "  'key': [\n"
+                "    1,\n"
+                "    2\n"
+                "  ],\n"
+                "  'k': [1, 2]\n"
+                "}\n"
+            )
+        ),
+
+        # Zero width
+        (
+            [1, [2]],
+            0,
+            (
+                "[\n"
+                "  1,\n"
+                "  [\n"
+                "    2\n"
+                "  ]\n"
+                "]\n"
+            )
+        )
+    )
+)
+
+LIMITS_TEST_DATA = (
+    ("value", "options", "expected_result"),
+    (
+        # Nested containers deeper than a max depth
+        (
+            {"a": [1, [2]], "b": BarDataclass(1), "c": []},
+            {"max_depth": 2},
+            (
+                "{\n"
+                "  'a': [\n"
+                "    1,\n"
+                "    [...]\n"
+                "  ],\n"
+                "  'b': BarDataclass(\n"
+                "    a=1\n"
+                "  ),\n"
+                "  'c': []\n"
+                "}\n"
+            )
+        ),
+
+        # Top container with a max depth of zero
+        (
+            frozenset({1}),
+            {"max_depth": 0},
+            "frozenset({...})\n"
+        ),
+
+        # Container longer than max items
+        (
+            [1, 2, 3],
+            {"max_items": 2},
+            (
+                "[\n"
+                "  1,\n"
+                "  2,\n"
+                "  ... (1 more)\n"
+                "]\n"
+            )
+        ),
+
+        # Container as long as max items
+        (
+            {1: 2, 3: 4},
+            {"max_items": 2},
+            (
+                "{\n"
+                "  1: 2,\n"
+                "  3: 4\n"
+                "}\n"
+            )
+        ),
+
+        # Single item tuple with max items of zero
+        (
+            (1,),
+            {"max_items": 0},
+            (
+                "(\n"
+                "  ... (1 more)\n"
+                ")\n"
+            )
+        ),
+
+        # Strings and bytes longer than a max string
+        (
+            ["abcdef", b"abcdef", bytearray(b"abc")],
+            {"max_string": 3},
+            (
+                "[\n"
+                "  'abc'... (3 more),\n"
+                "  b'abc'... (3 more),\n"
+                "  bytearray(b'abc')\n"
+                "]\n"
+            )
+        ),
+
+        # Strings elided in the middle
+        (
+            ["abcdefg", b"abcdef", "ab"],
+            {"max_string": 4, "elide_middle": True},
+            (
+                "[\n"
+                "  'ab'... (3 more) ...'fg',\n"
+                "  b'ab'... (2 more) ...b'ef',\n"
+                "  'ab'\n"
+                "]\n"
+            )
+        ),
+
+        # Keys of dicts cut to max_string
+        (
+            [{"abcdef": 1}, collections.OrderedDict({b"abcdef": 2}), collections.Counter("aab")],
+            {"max_string": 2, "width": 80},
+            (
+                "[\n"
+                "  {'ab'... (4 more): 1},\n"
+                "  OrderedDict({b'ab'... (4 more): 2}),\n"
+                "  Counter({'a': 2, 'b': 1})\n"
+                "]\n"
+            )
+        ),
+        (
+            {"abcdef": 1, "b": 2},
+            {"max_string": 4, "elide_middle": True, "sort_keys": True, "width": 80},
+            "{'ab'... (2 more) ...'ef': 1, 'b': 2}\n"
+        ),
+
+        # Strings elided in the middle without characters left for the end
+        (
+            ["abcdefg", b"abcdef"],
+            {"max_string": 1, "elide_middle": True},
+            "[\n  'a'... (6 more),\n  b'a'... (5 more)\n]\n"
+        ),
+
+        # Limits with a width
+        (
+            {"a": list(range(10)), "b": [[1]]},
+            {"max_depth": 2, "max_items": 3, "width": 80},
+            "{'a': [0, 1, 2, ... (7 more)], 'b': [[...]]}\n"
+        )
+    )
+)
+
+SUBCLASS_TEST_DATA = (
+    ("value", "expected_result"),
+    (
+        (
+            collections.OrderedDict([(1, 2)]),
+            (
+                "OrderedDict({\n"
+                "  1: 2\n"
+                "})\n"
+            )
+        ),
+        (
+            collections.OrderedDict(),
+            "OrderedDict()\n"
+        ),
+        (
+            collections.defaultdict(list, {1: [2]}),
+            (
+                "defaultdict(<class 'list'>, {\n"
+                "  1: [\n"
+                "    2\n"
+                "  ]\n"
+                "})\n"
+            )
+        ),
+        (
+            collections.defaultdict(list),
+            "defaultdict(<class 'list'>, {})\n"
+        ),
+        (
+            collections.Counter("abb"),
+            (
+                "Counter({\n"
+                "  'b': 2,\n"
+                "  'a': 1\n"
+                "})\n"
+            )
+        ),
+        (
+            collections.deque([1, 2], maxlen=3),
+            (
+                "deque([\n"
+                "  1,\n"
+                "  2\n"
+                "], maxlen=3)\n"
+            )
+        ),
+        (
+            collections.deque(),
+            "deque([])\n"
+        ),
+        (
+            FooNamedTuple(1, "b"),
+            (
+                "FooNamedTuple(\n"
+                "  a=1,\n"
+                "  b='b'\n"
+                ")\n"
+            )
+        ),
+        (
+            collections.namedtuple("BarNamedTuple", "")(),
+            "BarNamedTuple()\n"
+        ),
+        (
+            FooList([1]),
+            (
+                "[\n"
+                "  1\n"
+                "]\n"
+            )
+        ),
+        (
+            BarList([1]),
+            "BarList([1])\n"
+        ),
+        (
+            [MarkupRepr()],
+            (
+                "[\n"
+                "  <markup>\n"
+                "]\n"
+            )
+        ),
+        (
+            BazDataclassSubclass(1, "b"),
+            (
+                "BazDataclassSubclass(\n"
+                "  a=1,\n"
+                "  b='b'\n"
+                ")\n"
+            )
+        )
+    )
+)
+
 
 @pytest.mark.parametrize(*BEHAVIOR_TEST_DATA)
 def test_behavior(value: Any, indent: int, expected_result: str) -> None:
@@ -677,3 +1057,779 @@ def test_print_to_file(tmp_path: Path, value: str, indent: int, expected_result:
         content = stream.read()
 
     assert content == expected_result
+
+
+@pytest.mark.parametrize(*BEHAVIOR_TEST_DATA)
+def test_stream_behavior(value: Any, indent: int, expected_result: str) -> None:
+    stdout_context = StdoutContext()
+
+    with stdout_context:
+        pprint(value, indent=indent, stream=True)
+
+    assert stdout_context.get_value() == expected_result
+
+
+@pytest.mark.parametrize(*PRINT_TO_FILE_TEST_DATA)
+def test_stream_to_file(tmp_path: Path, value: str, indent: int, expected_result: str) -> None:
+    file = tmp_path / "file.txt"
+
+    with file.open("w", encoding="UTF-8") as stream:
+        pprint(value, indent=indent, file=stream, stream=True)
+
+    with file.open(encoding="UTF-8") as stream:
+        content = stream.read()
+
+    assert content == expected_result
+
+
+@pytest.mark.parametrize(*BEHAVIOR_TEST_DATA)
+def test_iter_pprint_behavior(value: Any, indent: int, expected_result: str) -> None:
+    assert "".join(iter_pprint(value, indent=indent)) + "\n" == expected_result
+
+
+def test_iter_pprint_yields_multiple_chunks() -> None:
+    value = [{"key": [i, str(i)]} for i in range(10000)]
+    stdout_context = StdoutContext()
+
+    with stdout_context:
+        pprint(value)
+
+    chunks = list(iter_pprint(value))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) + "\n" == stdout_context.get_value()
+
+
+@pytest.mark.parametrize(*INDENT_LESS_THAN_ZERO_TEST_DATA)
+def test_iter_pprint_indent_less_than_zero(indent: int) -> None:
+    with pytest.raises(ValueError):
+        iter_pprint([], indent=indent)
+
+
+@pytest.mark.parametrize(*BEHAVIOR_TEST_DATA)
+def test_pformat_behavior(value: Any, indent: int, expected_result: str) -> None:
+    assert pformat(value, indent=indent) + "\n" == expected_result
+
+
+@pytest.mark.parametrize(*INDENT_LESS_THAN_ZERO_TEST_DATA)
+def test_pformat_indent_less_than_zero(indent: int) -> None:
+    with pytest.raises(ValueError):
+        pformat([], indent=indent)
+
+
+@pytest.mark.parametrize(*BEHAVIOR_TEST_DATA)
+def test_printer_behavior(value: Any, indent: int, expected_result: str) -> None:
+    printer = PrettyPrinter(indent=indent)
+    stdout_context = StdoutContext()
+
+    with stdout_context:
+        printer.pprint(value)
+
+    assert stdout_context.get_value() == expected_result
+    assert printer.pformat(value) + "\n" == expected_result
+    assert "".join(printer.iter_pprint(value)) + "\n" == expected_result
+
+
+def test_printer_is_reusable() -> None:
+    printer = PrettyPrinter(indent=2, width=20, max_items=2)
+    value = {"a": [1, 2, 3], "b": "c" * 30}
+    expected_result = pformat(value, indent=2, width=20, max_items=2)
+
+    assert printer.pformat(value) == expected_result
+    assert printer.pformat(value) == expected_result
+    assert printer.pformat([[[1]]]) == pformat([[[1]]], indent=2, width=20, max_items=2)
+
+
+@pytest.mark.parametrize(
+    "name",
+    ("indent", "width", "max_depth", "max_items", "max_string", "cache_size")
+)
+def test_printer_validates_options(name: str) -> None:
+    with pytest.raises(ValueError):
+        PrettyPrinter(**{name: -1})
+
+
+def test_cache_keeps_output() -> None:
+    frozen = FrozenDataclass(1, (2, frozenset({"c"})))
+    value = {"a": frozen, "b": [frozen, (1, [2])], "c": FrozenDataclass([3], ())}
+    printer = PrettyPrinter(indent=2, cache_size=10000)
+
+    assert printer.pformat(value) == pformat(value, indent=2)
+    assert printer.pformat(value) == pformat(value, indent=2)
+    assert printer.pformat([[frozen]]) == pformat([[frozen]], indent=2)
+
+
+def test_cache_reuses_immutable_strings() -> None:
+    frozen = FrozenDataclass(1, (2, 3))
+    printer = PrettyPrinter(cache_size=10000)
+    expected_result = printer.pformat(frozen)
+    object.__setattr__(frozen, "a", 4)
+
+    assert printer.pformat(frozen) == expected_result
+    assert PrettyPrinter(cache_size=0).pformat(frozen) != expected_result
+
+
+def test_cache_skips_mutable_values() -> None:
+    frozen = FrozenDataclass([1], ())
+    printer = PrettyPrinter(cache_size=10000)
+    printer.pformat(frozen)
+    frozen.a.append(2)
+
+    assert printer.pformat(frozen) == pformat(frozen)
+
+
+def test_cache_with_recursive_values() -> None:
+    frozen = FrozenDataclass(1, ())
+    object.__setattr__(frozen, "b", (frozen,))
+    printer = PrettyPrinter(cache_size=10000)
+
+    for value in ([frozen], [frozen.b, frozen], frozen):
+        assert printer.pformat(value) == pformat(value)
+        assert "<Recursion on FrozenDataclass" in printer.pformat(value)
+
+
+def test_cache_follows_renderers() -> None:
+    value = (1, 2)
+    printer = PrettyPrinter(cache_size=10000)
+    expected_result = printer.pformat(value)
+
+    with override(int, lambda x: "int"):
+        assert printer.pformat(value) == "(\n    int,\n    int\n)"
+
+    assert printer.pformat(value) == expected_result
+
+
+@pytest.mark.parametrize("options", ({"references": True}, {"width": 80}))
+def test_cache_with_incompatible_options(options: Dict[str, Any]) -> None:
+    with pytest.raises(ValueError):
+        PrettyPrinter(cache_size=10000, **options)
+
+
+def _get_lines(values: Any, indent: int = 4) -> str:
+    return ",\n".join(" " * indent + repr(i) for i in values)
+
+
+@pytest.mark.parametrize(
+    "value, start_string, end_string",
+    (
+        (list(range(5000)), "[", "]"),
+        (tuple(map(str, range(100))), "(", ")"),
+        ([1, 2.5, "a", b"b", True, None, 3j] * 10, "[", "]"),
+        (set(range(100)), "{", "}"),
+        (frozenset(map(float, range(100))), "frozenset({", "})"),
+        (collections.deque(range(100), maxlen=200), "deque([", "], maxlen=200)")
+    )
+)
+def test_scalars(value: Any, start_string: str, end_string: str) -> None:
+    expected_result = f"{start_string}\n{_get_lines(value)}\n{end_string}"
+
+    assert pformat(value) == expected_result
+    assert "".join(iter_pprint(value)) == expected_result
+    assert pformat([value], indent=2) == (
+        f"[\n  {start_string}\n{_get_lines(value)}\n  {end_string}\n]"
+    )
+
+
+def test_scalars_with_limits() -> None:
+    value = ["abcdef"] * 2000
+
+    expected_lines = ",\n".join(["    'abc'... (3 more)"] * 1500)
+
+    assert pformat(value, max_items=1500, max_string=3) == (
+        f"[\n{expected_lines},\n    ... (500 more)\n]"
+    )
+
+
+def test_scalars_with_max_items_are_not_scanned() -> None:
+    class CountingList(list):
+
+        def __iter__(self) -> Iterator[Any]:
+            for item in super().__iter__():
+                iterated.append(item)
+                yield item
+
+    iterated = []
+    value = CountingList(range(10000))
+
+    assert pformat(value, max_items=3) == "[\n    0,\n    1,\n    2,\n    ... (9997 more)\n]"
+    assert len(iterated) < 100
+
+
+def test_renderers_returning_other_types() -> None:
+    with override(int, lambda x: Markup(f"<{x}>")):
+        assert pformat([1, 2], width=80) == "[<1>, <2>]"
+
+    with override(MarkupRepr, lambda x: 5):
+        assert pformat([MarkupRepr()], width=80) == "[5]"
+
+    stats = RenderStats()
+
+    assert pformat([MarkupRepr()], width=80, stats=stats) == "[<markup>]"
+    assert stats.by_type[MarkupRepr].characters == len("<markup>")
+
+
+@pytest.mark.parametrize("options", ({}, {"width": 10}, {"max_string": 3}))
+def test_top_level_scalars(options: Dict[str, Any]) -> None:
+    printer = PrettyPrinter(**options)
+    values = (1, 1.5, 1j, True, None, "abcdef", b"abcdef", "a" * 70000)
+
+    for value in values:
+        assert printer.pformat(value) == "".join(printer.iter_pprint(value))
+
+    with override(int, lambda x: Markup(f"<{x}>")):
+        assert printer.pformat(1) == "<1>"
+
+    assert printer.pformat(1) == "1"
+
+
+def test_scalars_with_renderers() -> None:
+    value = list(range(100))
+
+    with override(int, lambda x: "int"):
+        assert pformat(value) == "[\n" + ",\n".join(["    int"] * 100) + "\n]"
+
+    with override(bool, lambda x: "bool"):
+        assert pformat([*value, True]) == f"[\n{_get_lines(value)},\n    bool\n]"
+
+
+LONG_STRING_TEST_DATA = (
+    "value",
+    (
+        "a'b" * 100000,
+        "a'b\"\n\u20ac\\" * 30000,
+        b"a'b\x00\xff" * 60000
+    )
+)
+
+
+@pytest.mark.parametrize(*LONG_STRING_TEST_DATA)
+def test_long_strings(value: Any) -> None:
+    chunks = list(iter_pprint({"a": value}))
+
+    assert "".join(chunks) == "{\n    'a': " + repr(value) + "\n}"
+    # Escaped in slices, never as a whole.
+    assert max(map(len, chunks)) < len(value) // 2
+    assert pformat([value] * 20, indent=0) == "[\n" + ",\n".join([repr(value)] * 20) + "\n]"
+    assert pformat((value,), width=80) == f"(\n    {value!r},\n)"
+
+
+@pytest.mark.parametrize(*LONG_STRING_TEST_DATA)
+def test_long_keys(value: Any) -> None:
+    chunks = list(iter_pprint({value: 1, "a": value}))
+
+    assert "".join(chunks) == f"{{\n    {value!r}: 1,\n    'a': {value!r}\n}}"
+    assert max(map(len, chunks)) < len(value) // 2
+    assert pformat({value: 1}, max_string=3, width=80) == (
+        f"{{{value[:3]!r}... ({len(value) - 3} more): 1}}"
+    )
+
+
+@pytest.mark.parametrize("value", ("a'b" * 100000, b"a'b" * 100000))
+@pytest.mark.parametrize("elide_middle", (False, True))
+def test_long_strings_with_max_string(value: Any, elide_middle: bool) -> None:
+    max_string = len(value) - 10
+    chunks = list(iter_pprint(value, max_string=max_string, elide_middle=elide_middle))
+
+    if elide_middle:
+        end_size = max_string // 2
+        start_size = max_string - end_size
+        expected_result = (
+            f"{value[:start_size]!r}... (10 more) ...{value[len(value) - end_size:]!r}"
+        )
+    else:
+        expected_result = f"{value[:max_string]!r}... (10 more)"
+
+    assert "".join(chunks) == expected_result
+    assert max(map(len, chunks)) < len(value) // 2
+
+
+BUFFER_TEST_DATA = (
+    "value, expected_result",
+    (
+        (bytearray(b"abc"), "bytearray(b'abc')"),
+        (memoryview(b"abc"), "memoryview(bytes.fromhex('61 62 63'))"),
+        (
+            bytearray(range(20)),
+            "bytearray.fromhex(\n"
+            "  '00 01 02 03 04 05 06 07 08 09 0a 0b 0c 0d 0e 0f'\n"
+            "  '10 11 12 13'\n"
+            ")"
+        ),
+        (
+            memoryview(bytes(range(20))),
+            "memoryview(bytes.fromhex(\n"
+            "  '00 01 02 03 04 05 06 07 08 09 0a 0b 0c 0d 0e 0f'\n"
+            "  '10 11 12 13'\n"
+            "))"
+        ),
+        (
+            memoryview(array.array("h", range(3))),
+            "memoryview(bytes.fromhex('00 00 01 00 02 00')).cast('h')"
+            if sys.byteorder == "little"
+            else "memoryview(bytes.fromhex('00 00 00 01 00 02')).cast('h')"
+        ),
+        (array.array("i"), "array('i')"),
+        (array.array("d", [1.5, 2.0]), "array('d', [\n  1.5,\n  2.0\n])")
+    )
+)
+
+
+@pytest.mark.parametrize(*BUFFER_TEST_DATA)
+def test_buffers(value: Any, expected_result: str) -> None:
+    assert pformat(value, indent=2) == expected_result
+
+
+def test_buffers_with_max_string() -> None:
+    assert pformat(bytearray(range(20)), indent=2, max_string=1000) == pformat(
+        bytearray(range(20)),
+        indent=2
+    )
+    assert pformat(bytearray(range(20)), indent=2, max_string=16) == (
+        "bytearray.fromhex(\n"
+        "  '00 01 02 03 04 05 06 07 08 09 0a 0b 0c 0d 0e 0f'\n"
+        "  ... (4 more)\n"
+        ")"
+    )
+    assert pformat(bytearray(range(20)), indent=2, max_string=4, elide_middle=True) == (
+        "bytearray.fromhex(\n"
+        "  '00 01'\n"
+        "  ... (16 more)\n"
+        "  '12 13'\n"
+        ")"
+    )
+    assert pformat(bytearray(b"abcdef"), max_string=3) == "bytearray(b'abc')... (3 more)"
+
+
+def test_memoryviews_of_non_native_formats() -> None:
+    ctypes = pytest.importorskip("ctypes")
+
+    class Point(ctypes.Structure):
+        _fields_ = [("x", ctypes.c_int), ("y", ctypes.c_double)]
+
+    for value in (memoryview(ctypes.c_int(1)), memoryview(Point())):
+        assert pformat(value) == repr(value)
+
+
+@pytest.mark.parametrize("width", (None, 1000))
+def test_buffers_evaluate_back(width: Optional[int]) -> None:
+    value = [
+        bytearray(range(100)),
+        bytes(memoryview(bytes(range(50)))),
+        array.array("q", range(-50, 50)),
+        array.array("f", [0.5] * 30)
+    ]
+    namespace = {"array": array.array}
+
+    assert eval(pformat(value, width=width), namespace) == value
+    assert bytes(eval(pformat(memoryview(value[0]), width=width))) == value[0]
+
+
+def test_numpy_arrays() -> None:
+    numpy = pytest.importorskip("numpy")
+
+    assert pformat(numpy.array([[1, 2], [3, 4]]), indent=2) == (
+        "array([\n  [\n    1,\n    2\n  ],\n  [\n    3,\n    4\n  ]\n])"
+    )
+    assert pformat(numpy.arange(3, dtype=numpy.int8), width=80) == "array([0, 1, 2], dtype=int8)"
+
+
+@pytest.mark.parametrize("options", ({}, {"width": 40, "indent": 2}, {"max_items": 10005}))
+def test_workers(options: Dict[str, Any]) -> None:
+    rows = [{"a": i, "b": [str(i), (i,)]} for i in range(12000)]
+    value = BatDataclass(a=1, b="b", c=rows)
+    expected_result = pformat(value, **options)
+
+    assert pformat(value, workers=2, **options) == expected_result
+    assert "".join(iter_pprint(value, workers=2, **options)) == expected_result
+
+    # Items referring to the container or its parents are printed as recursion.
+    rows.insert(1, rows)
+    rows[0]["c"] = value
+    expected_result = pformat(value, **options)
+
+    assert "<Recursion on list" in expected_result
+    assert "<Recursion on BatDataclass" in expected_result
+    assert pformat(value, workers=2, **options) == expected_result
+
+
+def test_workers_with_unpicklable_values() -> None:
+    class Local:
+        def __repr__(self) -> str:
+            return "Local()"
+
+    rows = [[i, str(i)] for i in range(12000)]
+    rows[10].append(Local())
+    rows[11000].append(threading.Lock())
+    expected_result = pformat(rows)
+
+    assert pformat(rows, workers=2) == expected_result
+
+
+@pytest.mark.parametrize("options", ({"workers": 0}, {"workers": 2, "references": True}))
+def test_workers_with_invalid_options(options: Dict[str, Any]) -> None:
+    with pytest.raises(ValueError):
+        PrettyPrinter(**options)
+
+
+class SlowFile:
+    """A file writing a string in parts, like a pipe or a socket."""
+
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+
+    def write(self, string: str) -> None:
+        for i in range(0, len(string), 7):
+            self.parts.append(string[i:i + 7])
+            time.sleep(0)
+
+
+@pytest.mark.parametrize("stream", (False, True))
+def test_threads_dont_interleave(stream: bool) -> None:
+    file = SlowFile()
+    values = [{"thread": i, "items": list(range(i, i + 5))} for i in range(8)]
+
+    def print_value(value: Any) -> None:
+        for _ in range(10):
+            pprint(value, file=file, stream=stream)
+
+    threads = [threading.Thread(target=print_value, args=(i,)) for i in values]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    strings = "".join(file.parts).split("}\n")[:-1]
+
+    assert sorted(strings) == sorted(pformat(i)[:-1] for i in values for _ in range(10))
+
+
+SORT_TEST_DATA = (
+    "value, expected_result",
+    (
+        ({"b": 1, "a": 2, "c": {"e": 3, "d": 4}}, "{'a': 2, 'b': 1, 'c': {'d': 4, 'e': 3}}"),
+        ({2: "b", 1.5: "a", True: "c"}, "{True: 'c', 1.5: 'a', 2: 'b'}"),
+        ({"a": 1, 2: None, None: 3}, "{None: 3, 2: None, 'a': 1}"),
+        ({(1, "a"): 1, ("a",): 2}, "{(1, 'a'): 1, ('a',): 2}"),
+        (
+            {(frozenset({"b"}),), (frozenset({"a"}),), (frozenset({"c"}),)},
+            "{(frozenset({'a'}),), (frozenset({'b'}),), (frozenset({'c'}),)}"
+        ),
+        ({("x", float("nan")), ("x", 1.0), ("x", 0.5)}, "{('x', 0.5), ('x', 1.0), ('x', nan)}"),
+        (set(map(str, range(20))), "{" + ", ".join(sorted(f"'{i}'" for i in range(20))) + "}"),
+        (frozenset({"b", 1, None, "a"}), "frozenset({None, 1, 'a', 'b'})"),
+        (collections.defaultdict(int, b=1, a=2), "defaultdict(<class 'int'>, {'a': 2, 'b': 1})"),
+        (collections.OrderedDict(b=1, a=2), "OrderedDict({'b': 1, 'a': 2})"),
+        (
+            {frozenset({"b", "a"}): 1, frozenset({10, 2}): 2, frozenset(): 3},
+            "{frozenset(): 3, frozenset({'a', 'b'}): 1, frozenset({2, 10}): 2}"
+        ),
+        (
+            {float("nan"), 2.5, 1.0, 3},
+            "{1.0, 2.5, nan, 3}"
+        )
+    )
+)
+
+
+@pytest.mark.parametrize(*SORT_TEST_DATA)
+def test_sort(value: Any, expected_result: str) -> None:
+    assert pformat(value, width=1000, sort_keys=True, sort_sets=True) == expected_result
+
+
+def test_sort_doesnt_depend_on_hash_seed() -> None:
+    code = (
+        "from pprinty import pprint; "
+        "pprint([{str(i): {str(i), i, None} for i in range(50)}, frozenset('abcdef'), "
+        "{frozenset(i) for i in 'abcdef'}, {frozenset('ab'): 1, frozenset('cd'): 2}, "
+        "{(frozenset(i),) for i in 'abcdefgh'}, {('x', float(i)) for i in range(8)} "
+        "| {('x', float('nan'))}], "
+        "sort_keys=True, sort_sets=True)"
+    )
+    results = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env={
+                **os.environ,
+                "PYTHONHASHSEED": str(seed),
+                "PYTHONPATH": str(Path(__file__).parents[3])
+            },
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        for seed in range(3)
+    }
+
+    assert len(results) == 1
+
+
+def test_sort_takes_reprs_once() -> None:
+    reprs = []
+
+    class Item:
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        def __repr__(self) -> str:
+            reprs.append(self.name)
+            return self.name
+
+    value = {Item(i) for i in "cab"}
+
+    assert pformat(value, width=80, sort_sets=True) == "{a, b, c}"
+    assert sorted(reprs) == ["a", "b", "c"]
+
+
+def test_dataclass_fields() -> None:
+    value = HiddenFieldDataclass(1)
+    value.extra = 2
+    slots_value = SlotsDataclass(1, 2)
+    del slots_value.b
+
+    assert pformat(value, width=80) == "HiddenFieldDataclass(a=1)"
+    assert pformat([value, value], indent=2) == (
+        "[\n  HiddenFieldDataclass(\n    a=1\n  ),\n  HiddenFieldDataclass(\n    a=1\n  )\n]"
+    )
+    assert pformat(SlotsDataclass(1, 2), width=80) == "SlotsDataclass(a=1, b=2)"
+    assert pformat(slots_value, width=80) == "SlotsDataclass(a=1)"
+
+
+def test_fields_protocol() -> None:
+    assert pformat(FieldsObject([1]), width=80) == "FieldsObject(a=[1], double=[1, 1])"
+    assert pformat(FieldsObject(1), indent=2) == "FieldsObject(\n  a=1,\n  double=2\n)"
+    assert pformat(FieldsDataclass(1), width=80) == "FieldsDataclass(shown=1)"
+    assert pformat(FieldsObject(1), indent=2, references=True) == (
+        "FieldsObject(\n  a=1,\n  double=2\n)"
+    )
+
+
+def test_attrs() -> None:
+    attr = pytest.importorskip("attr")
+
+    @attr.s
+    class Foo:
+        a = attr.ib()
+        b = attr.ib(repr=False)
+        c = attr.ib(repr=lambda value: f"<{len(value)} items>")
+
+    @attr.s(slots=True, frozen=True)
+    class Bar:
+        a = attr.ib()
+
+    @attr.s
+    class Empty:
+        pass
+
+    assert pformat(Foo(1, 2, [3, 4]), width=80) == "Foo(a=1, c=<2 items>)"
+    assert pformat(Bar([1]), indent=2) == "Bar(\n  a=[\n    1\n  ]\n)"
+    assert pformat(Bar(1), width=80) == repr(Bar(1))
+    assert pformat(Empty()) == "Empty()"
+
+
+def test_pydantic(monkeypatch: pytest.MonkeyPatch) -> None:
+    class BaseModel:
+        def __init__(self, **fields: Any) -> None:
+            self.__dict__.update(fields)
+
+        def __repr_args__(self) -> List[tuple]:
+            # Like pydantic, without fields hidden from the representation.
+            return [(name, value) for name, value in vars(self).items() if name != "hidden"]
+
+    pydantic = types.ModuleType("pydantic")
+    pydantic.BaseModel = BaseModel
+    monkeypatch.setitem(sys.modules, "pydantic", pydantic)
+
+    class User(BaseModel):
+        pass
+
+    assert pformat(User(id=1, tags=["a"], hidden=2), width=80) == "User(id=1, tags=['a'])"
+    assert pformat(User(id=1, extra=[2]), indent=2) == "User(\n  id=1,\n  extra=[\n    2\n  ]\n)"
+    assert pformat(User()) == "User()"
+
+
+def test_simple_namespace() -> None:
+    class FooNamespace(types.SimpleNamespace):
+        pass
+
+    assert pformat(types.SimpleNamespace(a=1, b=[2]), width=80) == "namespace(a=1, b=[2])"
+    assert pformat(types.SimpleNamespace(a=1), indent=2) == "namespace(\n  a=1\n)"
+    assert pformat(types.SimpleNamespace()) == "namespace()"
+    assert pformat(FooNamespace(a=1), width=80) == "FooNamespace(a=1)"
+
+
+def test_deep_nesting() -> None:
+    depth = sys.getrecursionlimit() * 10
+    value = [1]
+
+    for _ in range(depth - 1):
+        value = [value]
+
+    string = "".join(iter_pprint(value, indent=1))
+    lines = string.split("\n")
+
+    assert len(lines) == depth * 2 + 1
+    assert lines[depth - 1] == " " * (depth - 1) + "["
+    assert lines[depth] == " " * depth + "1"
+    assert lines[depth + 1] == " " * (depth - 1) + "]"
+
+
+def test_deep_nesting_prefixes() -> None:
+    printer = PrettyPrinter(indent=2)
+    depth = 100
+    value = [1]
+
+    for _ in range(depth - 1):
+        value = [value]
+
+    lines = printer.pformat(value).split("\n")
+
+    assert len(printer._prefixes) < depth
+    assert lines[depth - 1] == " " * 2 * (depth - 1) + "["
+    assert lines[depth] == " " * 2 * depth + "1"
+    assert lines[depth + 1] == " " * 2 * (depth - 1) + "]"
+
+
+def test_recursion() -> None:
+    list_ = [1]
+    list_.append(list_)
+    dict_ = {"list": list_}
+    dict_["dict"] = dict_
+
+    assert "".join(iter_pprint(dict_, indent=2)) == (
+        "{\n"
+        "  'list': [\n"
+        "    1,\n"
+        f"    <Recursion on list with id={id(list_)}>\n"
+        "  ],\n"
+        f"  'dict': <Recursion on dict with id={id(dict_)}>\n"
+        "}"
+    )
+
+
+def test_dataclass_recursion() -> None:
+    parent = BatDataclass(1, "parent", None)
+    parent.c = BatDataclass(2, "child", parent)
+
+    assert "".join(iter_pprint(parent, indent=2)) == (
+        "BatDataclass(\n"
+        "  a=1,\n"
+        "  b='parent',\n"
+        "  c=BatDataclass(\n"
+        "    a=2,\n"
+        "    b='child',\n"
+        f"    c=<Recursion on BatDataclass with id={id(parent)}>\n"
+        "  )\n"
+        ")"
+    )
+
+
+def test_references() -> None:
+    list_ = [1]
+    tuple_ = (list_,)
+    value = {"a": [list_, BarDataclass(tuple_)], "b": {"c": tuple_}, "d": list_}
+
+    assert "".join(iter_pprint(value, indent=2, references=True)) == (
+        "{\n"
+        "  'a': [\n"
+        "    [\n"
+        "      1\n"
+        "    ],\n"
+        "    BarDataclass(\n"
+        "      a=(\n"
+        "        <Reference to list at ['a'][0]>,\n"
+        "      )\n"
+        "    )\n"
+        "  ],\n"
+        "  'b': {\n"
+        "    'c': <Reference to tuple at ['a'][1].a>\n"
+        "  },\n"
+        "  'd': <Reference to list at ['a'][0]>\n"
+        "}"
+    )
+
+
+def test_references_keep_output_linear() -> None:
+    value = [1]
+
+    for _ in range(100):
+        value = [value, value]
+
+    string = "".join(iter_pprint(value, references=True))
+
+    assert string.count("\n") < 1000
+
+
+@pytest.mark.parametrize(*WIDTH_TEST_DATA)
+def test_width(value: Any, width: int, expected_result: str) -> None:
+    stdout_context = StdoutContext()
+
+    with stdout_context:
+        pprint(value, indent=2, width=width)
+
+    assert stdout_context.get_value() == expected_result
+    assert "".join(iter_pprint(value, indent=2, width=width)) + "\n" == expected_result
+
+
+def test_width_less_than_zero() -> None:
+    with pytest.raises(ValueError):
+        pprint([], width=-1)
+
+
+def test_width_keeps_lines_short() -> None:
+    value = {str(i): [list(range(i)), {"nested": (i,) * i}] for i in range(30)}
+    string = "".join(iter_pprint(value, width=40))
+
+    assert max(map(len, string.split("\n"))) <= 40
+
+
+@pytest.mark.parametrize(*LIMITS_TEST_DATA)
+def test_limits(value: Any, options: Dict[str, Any], expected_result: str) -> None:
+    stdout_context = StdoutContext()
+
+    with stdout_context:
+        pprint(value, indent=2, **options)
+
+    assert stdout_context.get_value() == expected_result
+
+
+@pytest.mark.parametrize("name", ("max_depth", "max_items", "max_string"))
+def test_limit_less_than_zero(name: str) -> None:
+    with pytest.raises(ValueError):
+        pprint([], **{name: -1})
+
+
+def test_max_items_skips_items() -> None:
+    class Unprintable:
+
+        def __repr__(self) -> str:
+            raise AssertionError("Skipped item is printed!")
+
+    value = [1, 2] + [Unprintable()] * 1000
+
+    assert "".join(iter_pprint(value, indent=2, max_items=2)) == (
+        "[\n"
+        "  1,\n"
+        "  2,\n"
+        "  ... (1000 more)\n"
+        "]"
+    )
+
+
+@pytest.mark.parametrize(*SUBCLASS_TEST_DATA)
+def test_subclass(value: Any, expected_result: str) -> None:
+    stdout_context = StdoutContext()
+
+    with stdout_context:
+        pprint(value, indent=2)
+
+    assert stdout_context.get_value() == expected_result
+
+
+def test_many_types() -> None:
+    values = [type(f"Foo{i}", (), {"__repr__": lambda self, i=i: f"Foo{i}()"})() for i in range(3000)]
+
+    assert "".join(iter_pprint(values, width=0)) == (
+        "[\n" + ",\n".join(f"    Foo{i}()" for i in range(3000)) + "\n]"
+    )
@@ -0,0 +1,115 @@
+from typing import Iterator
+import threading
+
+import pytest
+
+from pprinty import pprint, register, unregister, override
+from tests.stdout_context import StdoutContext
+
+
+class Money:
+
+    def __init__(self, amount: int) -> None:
+        self.amount = amount
+
+
+class Dollars(Money):
+    pass
+
+
+def render_money(value: Money) -> str:
+    return f"${value.amount}"
+
+
+@pytest.fixture
+def registered_money() -> Iterator[None]:
+    register(Money, render_money)
+
+    try:
+        yield
+    finally:
+        unregister(Money)
+
+
+def get_output(value: object) -> str:
+    stdout_context = StdoutContext()
+
+    with stdout_context:
+        pprint(value, indent=2)
+
+    return stdout_context.get_value()
+
+
+@pytest.mark.usefixtures("registered_money")
+def test_register() -> None:
+    assert get_output([Money(1), Dollars(2)]) == (
+        "[\n"
+        "  $1,\n"
+        "  $2\n"
+        "]\n"
+    )
+
+
+def test_register_as_decorator() -> None:
+    @register(Money)
+    def render(value: Money) -> str:
+        return f"{value.amount} USD"
+
+    try:
+        assert get_output(Money(1)) == "1 USD\n"
+    finally:
+        unregister(Money)
+
+
+def test_register_built_in_type() -> None:
+    register(list, lambda value: f"<list of {len(value)}>")
+
+    try:
+        assert get_output({"a": [1, 2]}) == (
+            "{\n"
+            "  'a': <list of 2>\n"
+            "}\n"
+        )
+    finally:
+        unregister(list)
+
+
+def test_unregister() -> None:
+    register(Money, render_money)
+    unregister(Money)
+
+    assert get_output(Money(1)).startswith("<tests.tests.registry.test_registry.Money object at")
+
+
+def test_unregister_not_registered() -> None:
+    with pytest.raises(ValueError):
+        unregister(Money)
+
+
+@pytest.mark.usefixtures("registered_money")
+def test_override() -> None:
+    with override(Money, lambda value: "overridden"):
+        assert get_output(Money(1)) == "overridden\n"
+
+        with override(Dollars, lambda value: "nested"):
+            assert get_output([Money(1), Dollars(2)]) == (
+                "[\n"
+                "  overridden,\n"
+                "  nested\n"
+                "]\n"
+            )
+
+        assert get_output(Dollars(1)) == "overridden\n"
+
+    assert get_output(Money(1)) == "$1\n"
+
+
+def test_override_is_local_to_thread() -> None:
+    outputs = []
+
+    with override(Money, render_money):
+        thread = threading.Thread(target=lambda: outputs.append(get_output(Money(1))))
+        thread.start()
+        thread.join()
+
+    assert not outputs[0].startswith("$")
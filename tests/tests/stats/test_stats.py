@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from typing import Any, Dict
+import io
+
+import pytest
+
+from pprinty import pformat, iter_pprint, pprint, override, PrettyPrinter, RenderStats
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+VALUE = {
+    "points": [Point(1, 2), Point(3, 4)],
+    "numbers": list(range(100)),
+    "blob": bytearray(40),
+    "text": "a'b" * 30000
+}
+
+
+@pytest.mark.parametrize(
+    "options",
+    (
+        {},
+        {"width": 80},
+        {"max_items": 3, "max_string": 10, "sort_keys": True},
+        {"max_depth": 1}
+    )
+)
+def test_output_is_the_same(options: Dict[str, Any]) -> None:
+    stats = RenderStats()
+
+    assert pformat(VALUE, stats=stats, **options) == pformat(VALUE, **options)
+    assert stats.characters == len(pformat(VALUE, **options))
+
+
+def test_counters() -> None:
+    stats = RenderStats()
+    string = pformat(VALUE, stats=stats)
+    by_type = stats.by_type
+    by_getter = stats.by_getter
+
+    assert by_type[Point].nodes == 2
+    assert by_type[int].nodes == 104
+    assert by_type[int].characters == len("".join(map(repr, range(100)))) + 4
+    assert by_type[str].characters == len(repr(VALUE["text"]))
+    assert by_getter["_get_dataclass_container"].nodes == 2
+    assert by_getter["repr"].nodes == 104
+    assert stats.max_depth == 3
+    assert stats.characters == len(string)
+    assert stats.time >= stats.getter_time >= 0
+    assert stats.layout_time == stats.time - stats.getter_time
+    assert "builtins.int" in str(stats)
+
+
+def test_stats_add_up() -> None:
+    stats = RenderStats()
+    chunks = list(iter_pprint([1, [2]], stats=stats))
+    pprint([1, [2]], file=io.StringIO(), stream=True, stats=stats)
+
+    assert stats.by_type[int].nodes == 4
+    assert stats.by_type[list].nodes == 4
+    assert stats.characters == len("".join(chunks)) * 2
+    assert stats.max_depth == 2
+
+
+def test_renderers() -> None:
+    stats = RenderStats()
+
+    with override(Point, lambda point: "point"):
+        assert pformat([Point(1, 2)], stats=stats) == "[\n    point\n]"
+
+    assert stats.by_type[Point].nodes == 1
+    assert stats.by_type[Point].characters == 5
+    assert "test_renderers.<locals>.<lambda>" in stats.by_getter
+
+
+def test_cache_and_workers_are_skipped() -> None:
+    printer = PrettyPrinter(cache_size=1000)
+    value = (1, (2, 3))
+    printer.pformat(value)
+    stats = RenderStats()
+
+    assert printer.pformat(value, stats=stats) == printer.pformat(value)
+    assert stats.by_type[int].nodes == 3